@@ -1,12 +1,15 @@
 # backend/app.py - VERSIÓN 3.3.0 - FINAL (LIMPIO)
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g
 from flask_cors import CORS
 from database.db import get_session, create_all
 from sqlalchemy import text, desc
-import jwt
+import hmac
+import os
 from functools import wraps
 import sentry_sdk
 from config import Config
+from http_cache import conditional_get, encoded_response, streamed_response, PUBLIC_CACHE, PRIVATE_CACHE
+import zlib
 
 # --- MODELOS ---
 # (Solo importamos lo necesario para que SQLAlchemy registre las relaciones)
@@ -32,20 +35,28 @@ from models.test_preference import (
 # --- SERVICIOS ---
 from services.activity_service import ActivityService
 from services.glossary_service import (
-    get_all_glossary_terms, search_glossary, get_glossary_stats,
-    mark_term_as_learned, get_learned_terms, record_quiz_attempt
+    search_glossary, get_glossary_stats,
+    mark_term_as_learned, get_learned_terms, record_quiz_attempt,
+    suggest_glossary_terms, get_glossary_page, get_glossary_etag
 )
 
 from services.course_service import CourseService
 from services.badge_service import BadgeService
-from services.progress_service import mark_lesson_completed, get_user_course_progress
+from services.progress_service import mark_lesson_completed, get_user_course_progress, sync_lesson_completions
 from services.auth_service import AuthService
-from services.lesson_service import create_lesson, get_course_lessons_with_status
-from services.streak_service import StreakService
+from services.lesson_service import create_lesson, get_course_lessons_with_status, get_lesson_lock, is_course_accessible
+from services.dashboard_service import get_dashboard
 from services.glossary_favorite_service import toggle_favorite, get_user_favorites, is_favorite
 from services.daily_term_service import get_daily_term_for_user, complete_daily_term
 from services.test_preference_service import TestPreferenceService
 from services.password_reset_service import create_reset_token, validate_reset_token, reset_password
+from services.sync_service import get_catalog_changes
+from services.lesson_cache import get_lesson_payload, get_bundle_hash, iter_course_bundle, LESSON_ENCODINGS
+from services.content_graph import get_content_graph
+from services.password_hasher import PasswordHasherBusy, get_pool_stats
+from services.token_cache import verify_access_token, get_token_cache_stats
+from services.leaderboard_service import get_leaderboard_page, get_user_rank
+from services.content_version_service import get_content_stamp, COURSES_SCOPE, TEST_PREFERENCE_SCOPE
 
 # -------------------------------------------------------------------
 # CONFIGURACIÓN
@@ -67,6 +78,7 @@ try:
         create_all()
         session = get_session()
         session.execute(text("SELECT 1"))
+        get_content_graph()
         print("✅ Base de datos conectada correctamente")
 except Exception as e:
     sentry_sdk.capture_exception(e)
@@ -88,7 +100,8 @@ def token_required(f):
             return jsonify({'error': 'Formato de token inválido'}), 401
 
         try:
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+            # Firma verificada una vez por token; los siguientes usos salen de la caché
+            data = verify_access_token(token)
             current_user_id = data['user_id']
             sentry_sdk.set_user({"id": current_user_id, "email": data.get('email')})
         except Exception as e:
@@ -97,14 +110,56 @@ def token_required(f):
         return f(current_user_id, *args, **kwargs)
     return decorated
 
+# ---------- VALIDADORES DE CACHÉ HTTP ----------
+def content_validators(scope, *parts):
+    """(ETag, Last-Modified) a partir de la versión de contenido (sin consultar tablas de contenido)."""
+    version, updated_at = get_content_stamp(scope)
+    return "-".join([scope, str(version), *map(str, parts)]), updated_at
+
+def bundle_validators(current_user_id, course_id):
+    lesson_ids = get_content_graph().course_lessons.get(course_id)
+    if not lesson_ids:
+        return None
+    session = get_session()
+    try:
+        bundle_hash = get_bundle_hash(session, course_id, lesson_ids)
+    finally:
+        session.close()
+    # La vista reutiliza el hash ya calculado (cabecera del paquete y X-Bundle-Hash)
+    g.bundle_hash = bundle_hash
+    return bundle_hash, get_content_stamp(COURSES_SCOPE)[1]
+
+def glossary_validators(current_user_id):
+    variant = format(zlib.crc32(request.query_string), 'x')
+    return get_glossary_etag(current_user_id, request.args.get('fields'), variant), None
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({'status': 'OK', 'version': '3.3.0'})
 
+@app.route('/api/internal/metrics', methods=['GET'])
+def metrics():
+    """Métricas del worker que atiende el request (solo con X-Metrics-Token)."""
+    provided = request.headers.get('X-Metrics-Token', '')
+    if not Config.METRICS_TOKEN or not hmac.compare_digest(provided, Config.METRICS_TOKEN):
+        return jsonify({"error": "No encontrado"}), 404
+    return jsonify({
+        'pid': os.getpid(),
+        'token_cache': get_token_cache_stats(),
+        'bcrypt_pool': get_pool_stats()
+    })
+
 # ==========================================
 # 🔐 AUTH
 # ==========================================
 
+def busy_response(message):
+    """503 inmediato cuando el pool de bcrypt está saturado (la app reintenta)."""
+    response = jsonify({"error": message})
+    response.status_code = 503
+    response.headers['Retry-After'] = '2'
+    return response
+
 @app.route('/api/auth/register', methods=['POST'])
 def register():
     try:
@@ -114,6 +169,8 @@ def register():
         return jsonify(result), 201
     except ValueError as ve:
         return jsonify({"error": str(ve)}), 400
+    except PasswordHasherBusy as busy:
+        return busy_response(str(busy))
     except Exception as e:
         sentry_sdk.capture_exception(e)
         return jsonify({"error": "Error interno"}), 500
@@ -127,6 +184,8 @@ def login():
         return jsonify(result)
     except ValueError as ve:
         return jsonify({"error": str(ve)}), 401
+    except PasswordHasherBusy as busy:
+        return busy_response(str(busy))
     except Exception as e:
         sentry_sdk.capture_exception(e)
         return jsonify({"error": "Error interno"}), 500
@@ -174,6 +233,7 @@ def logout_route(current_user_id):
         data = request.get_json()
         auth_service = AuthService()
         auth_service.revoke_refresh_token(data.get('refresh_token'))
+        auth_service.revoke_access_token(current_user_id, request.headers['Authorization'].split()[1])
         return jsonify({"success": True})
     except Exception:
         return jsonify({"error": "Error logout"}), 500
@@ -257,6 +317,8 @@ def reset_password_route():
     except ValueError as e:
         print(f"❌ [RESET] ValueError: {str(e)}")
         return jsonify({"success": False, "message": str(e)}), 400
+    except PasswordHasherBusy as busy:
+        return busy_response(str(busy))
     except Exception as e:
         print(f"❌ [RESET] Exception: {str(e)}")
         return jsonify({"success": False, "message": "Error interno"}), 500
@@ -293,69 +355,10 @@ def get_user_profile(current_user_id):
 @app.route('/api/user/dashboard', methods=['GET'])
 @token_required
 def get_user_dashboard(current_user_id):
-    session = get_session()
-    try:
-        user = session.query(User).filter_by(id=current_user_id).first()
-        streak_service = StreakService()
-        
-        # 1. Obtener TODOS los cursos ordenados
-        all_courses = session.query(Course).order_by(Course.id).all()
-        total_courses = len(all_courses)
-        
-        course_progress_list = []
-        completed_count = 0
-        next_course_obj = None
-
-        for course in all_courses:
-            prog = session.query(UserCourseProgress).filter_by(user_id=current_user_id, course_id=course.id).first()
-            percentage = prog.percentage if prog else 0
-            
-            total_lessons = session.query(Lesson).filter_by(course_id=course.id).count()
-            completed_lessons = int((percentage / 100) * total_lessons) if total_lessons > 0 else 0
-
-            if percentage == 100:
-                completed_count += 1
-            elif next_course_obj is None:
-                next_course_obj = {
-                    "title": course.title,
-                    "level": course.level
-                }
-
-            course_progress_list.append({
-                "course_id": course.id, 
-                "title": course.title,
-                "completed_lessons": completed_lessons, 
-                "total_lessons": total_lessons,         
-                "percentage": percentage
-            })
-            
-        current_streak_value = streak_service.update_and_get_streak(current_user_id)
-        badges_count = session.query(UserBadge).filter_by(user_id=current_user_id).count()
-        has_preference_result = session.query(TestResult).filter_by(user_id=current_user_id).first() is not None
-        final_exam_passed = (completed_count == total_courses) and (total_courses > 0)
-        
-        return jsonify({
-            "success": True,
-            "dashboard": {
-                "total_xp": user.total_xp,
-                "level": user.get_level(),
-                "xp_next_level": user.get_xp_for_next_level(),
-                "current_streak": current_streak_value,
-                "badges_count": badges_count,
-                "courses_progress": course_progress_list,
-                "next_course": next_course_obj,
-                "completed_courses": completed_count,
-                "total_courses": total_courses,
-                "has_preference_result": has_preference_result,
-                "final_exam_passed": final_exam_passed,
-                
-                # ✅ AGREGAR ESTOS DOS CAMPOS NUEVOS
-                "is_academic": user.is_academic_email(),
-                "institution": user.get_institution()
-            }
-        })
-    finally:
-        session.close()
+    dashboard = get_dashboard(current_user_id)
+    if dashboard is None:
+        return jsonify({"error": "No encontrado"}), 404
+    return jsonify({"success": True, "dashboard": dashboard})
 
 @app.route('/api/user/badges', methods=['GET'])
 @token_required
@@ -370,11 +373,35 @@ def get_user_badges(current_user_id):
     finally:
         session.close()
 
+@app.route('/api/user/badges/pending', methods=['GET'])
+@token_required
+def get_pending_badges(current_user_id):
+    """Insignias ganadas en segundo plano (modo async) desde la última consulta."""
+    return jsonify({"success": True, "badges": BadgeService().pop_pending_badges(current_user_id)})
+
+@app.route('/api/leaderboard', methods=['GET'])
+@token_required
+def get_leaderboard_route(current_user_id):
+    """Ranking de XP global o por institución (?institution=UNI), paginado con offset/limit."""
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    institution = request.args.get('institution') or None
+    page = get_leaderboard_page(institution, offset, limit)
+    page["me"] = get_user_rank(current_user_id, institution)
+    return jsonify({"success": True, **page})
+
+@app.route('/api/leaderboard/me', methods=['GET'])
+@token_required
+def get_my_rank_route(current_user_id):
+    institution = request.args.get('institution') or None
+    return jsonify({"success": True, "rank": get_user_rank(current_user_id, institution)})
+
 # ==========================================
 # 📚 CURSOS
 # ==========================================
 
 @app.route('/api/courses', methods=['GET'])
+@conditional_get(lambda: content_validators(COURSES_SCOPE), PUBLIC_CACHE)
 def get_courses():
     session = get_session()
     try:
@@ -401,66 +428,55 @@ def get_course_lessons(current_user_id, course_id): # <--- Recibir user_id
         sentry_sdk.capture_exception(e)
         return jsonify({"error": "Error obteniendo lecciones"}), 500
 
+@app.route('/api/courses/<int:course_id>/bundle', methods=['GET'])
+@token_required
+# ETag = hash del contenido del paquete: si el cliente ya lo tiene, 304 sin generar nada
+@conditional_get(bundle_validators, encodings=('gzip',))
+def get_course_bundle(current_user_id, course_id):
+    lesson_ids = get_content_graph().course_lessons.get(course_id)
+    if not lesson_ids:
+        return jsonify({"error": "Curso no encontrado"}), 404
+
+    access = is_course_accessible(current_user_id, course_id)
+    if not access["accessible"]:
+        return jsonify({"error": "Curso bloqueado", "message": access["reason"]}), 403
+
+    bundle_hash = g.bundle_hash
+
+    # Las lecciones se leen de la caché una a una mientras se envía la respuesta
+    response = streamed_response(iter_course_bundle(course_id, lesson_ids, bundle_hash))
+    response.headers['X-Bundle-Hash'] = bundle_hash
+    return response
+
 @app.route('/api/lessons/<lesson_id>', methods=['GET'])
 @token_required
+# El 304 se responde antes del chequeo de bloqueo: el cliente solo tiene el ETag
+# si ya recibió la lección desbloqueada, y las lecciones no se vuelven a bloquear.
+@conditional_get(lambda current_user_id, lesson_id: content_validators(COURSES_SCOPE, lesson_id), encodings=LESSON_ENCODINGS)
 def get_lesson_secure(current_user_id, lesson_id):
+    if get_content_graph().lesson(lesson_id) is None:
+        return jsonify({"error": "No encontrada"}), 404
+
     session = get_session()
     try:
-        lesson = session.query(Lesson).filter_by(id=lesson_id).first()
-        if not lesson: 
-            return jsonify({"error": "No encontrada"}), 404
-        
-        # Obtener todas las lecciones del curso ordenadas
-        all_lessons = session.query(Lesson).filter_by(
-            course_id=lesson.course_id
-        ).order_by(Lesson.order_index).all()
-        
-        # Encontrar el índice de la lección actual
-        current_index = next(
-            (i for i, l in enumerate(all_lessons) if l.id == lesson_id), 
-            -1
-        )
-        
-        # Primera lección (índice 0) siempre desbloqueada
-        if current_index > 0:
-            prev_lesson = all_lessons[current_index - 1]
-            prog = session.query(UserLessonProgress).filter_by(
-                user_id=current_user_id, 
-                lesson_id=prev_lesson.id, 
-                completed=True
-            ).first()
-            if not prog: 
-                return jsonify({
-                    "error": "Bloqueada", 
-                    "message": f"Completa {prev_lesson.title}"
-                }), 403
-        
-        # Extraer screens correctamente
-        screens_data = []
-        if lesson.screens:
-            if isinstance(lesson.screens, dict) and "screens" in lesson.screens:
-                screens_data = lesson.screens.get("screens", [])
-            elif isinstance(lesson.screens, list):
-                screens_data = lesson.screens
-        
-        # --- 🆕 CAMBIO AQUÍ: Extraer el tema visual del contenido ---
-        lesson_theme = lesson.content.get("theme") if lesson.content else None
+        # Primera lección siempre desbloqueada; si no, un solo EXISTS sobre la anterior
+        lock = get_lesson_lock(session, current_user_id, lesson_id, check_course=False)
+        if lock is not None:
+            _, prev_lesson = lock
+            return jsonify({
+                "error": "Bloqueada", 
+                "message": f"Completa {prev_lesson.title}"
+            }), 403
         
-        return jsonify({
-            "success": True, 
-            "id": lesson.id, 
-            "title": lesson.title,
-            "description": lesson.description,
-            "type": lesson.type,        # <--- 🆕 IMPORTANTE: Tipo de juego (crisis, tycoon, etc.)
-            "theme": lesson_theme,      # <--- 🆕 IMPORTANTE: Colores (neón, oscuro, etc.)
-            "screens": screens_data, 
-            "total_screens": len(screens_data),
-            "duration_minutes": lesson.duration_minutes,
-            "xp_reward": lesson.xp_reward or 20
-        })
+        # El cuerpo (content/screens) sale de la caché
+        payload = get_lesson_payload(session, lesson_id)
+        if payload is None:
+            return jsonify({"error": "No encontrada"}), 404
     finally:
         session.close()
 
+    return encoded_response(payload.body, payload.gzip, payload.brotli)
+
 @app.route('/api/progress/lesson/<lesson_id>', methods=['POST'])
 @token_required
 def complete_lesson_route(current_user_id, lesson_id):
@@ -470,20 +486,58 @@ def complete_lesson_route(current_user_id, lesson_id):
     except Exception:
         return jsonify({"error": "Error"}), 500
 
+@app.route('/api/progress/sync', methods=['POST'])
+@token_required
+def sync_progress_route(current_user_id):
+    """Lecciones completadas offline: [{"idempotency_key": "...", "lesson_id": "..."}, ...] en orden."""
+    data = request.get_json(silent=True) or {}
+    try:
+        result = sync_lesson_completions(current_user_id, data.get('events'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        sentry_sdk.capture_exception(e)
+        return jsonify({"error": "Error sincronizando progreso"}), 500
+
+    if result.get("error"):
+        return jsonify(result), 404
+    return jsonify({"success": True, "data": result})
+
 # ==========================================
 # 📖 GLOSARIO
 # ==========================================
 
 @app.route('/api/glossary', methods=['GET'])
 @token_required
+@conditional_get(glossary_validators, PRIVATE_CACHE)
 def get_glossary_route(current_user_id):
-    return jsonify({"success": True, "terms": get_all_glossary_terms(user_id=current_user_id)})
+    # Sin limit se devuelve todo el catálogo (versiones anteriores de la app)
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        limit = min(max(limit, 1), 100)
+    try:
+        page = get_glossary_page(
+            user_id=current_user_id,
+            after=request.args.get('after'),
+            limit=limit,
+            lang=request.args.get('lang'),
+            fields=request.args.get('fields')
+        )
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+    return jsonify({"success": True, **page})
 
 @app.route('/api/glossary/search', methods=['GET'])
 @token_required
 def search_glossary_route(current_user_id):
     return jsonify({"success": True, "terms": search_glossary(request.args.get('q', ''), user_id=current_user_id)})
 
+@app.route('/api/glossary/suggest', methods=['GET'])
+@token_required
+def suggest_glossary_route(current_user_id):
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    return jsonify({"success": True, "suggestions": suggest_glossary_terms(request.args.get('prefix', ''), limit)})
+
 @app.route('/api/glossary/<int:glossary_id>/mark-learned', methods=['POST'])
 @token_required
 def mark_learned_route(current_user_id, glossary_id):
@@ -517,12 +571,27 @@ def complete_daily_term_route(current_user_id):
     data = request.get_json()
     return jsonify(complete_daily_term(current_user_id, data.get('term_id')))
 
+# ==========================================
+# 🔄 SINCRONIZACIÓN OFFLINE
+# ==========================================
+
+@app.route('/api/sync/catalog', methods=['GET'])
+@token_required
+def sync_catalog_route(current_user_id):
+    try:
+        since = request.args.get('since', type=int)
+        return jsonify({"success": True, **get_catalog_changes(since)})
+    except Exception as e:
+        sentry_sdk.capture_exception(e)
+        return jsonify({"error": "Error sincronizando catálogo"}), 500
+
 # ==========================================
 # 🎯 TEST DE PREFERENCIAS (NUEVO)
 # ==========================================
 
 @app.route('/api/test/questions', methods=['GET'])
 @token_required
+@conditional_get(lambda current_user_id: content_validators(TEST_PREFERENCE_SCOPE, 'questions'))
 def get_test_questions(current_user_id):
     try:
         service = TestPreferenceService()
@@ -546,6 +615,7 @@ def submit_test_preference(current_user_id):
 
 @app.route('/api/test/recommendations/<role>', methods=['GET'])
 @token_required
+@conditional_get(lambda current_user_id, role: content_validators(TEST_PREFERENCE_SCOPE, 'recommendations', role))
 def get_test_recommendations(current_user_id, role):
     try:
         service = TestPreferenceService()
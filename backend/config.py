@@ -18,6 +18,26 @@ class Config:
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Cada cuántos segundos un worker revisa si cambió la versión del contenido (glosario, cursos)
+    CONTENT_VERSION_CHECK_SECONDS = int(os.getenv('CONTENT_VERSION_CHECK_SECONDS', '5'))
+    
+    # Margen de la sincronización delta: los cambios de los últimos N segundos se reenvían
+    # (cubre transacciones que confirman tarde con un updated_at anterior)
+    SYNC_WATERMARK_OVERLAP_SECONDS = int(os.getenv('SYNC_WATERMARK_OVERLAP_SECONDS', '300'))
+    
+    # Similitud mínima (0-1) para la búsqueda difusa del glosario
+    GLOSSARY_FUZZY_THRESHOLD = float(os.getenv('GLOSSARY_FUZZY_THRESHOLD', '0.4'))
+    
+    # Memoria máxima (bytes) de la caché de lecciones serializadas por worker
+    LESSON_CACHE_MAX_BYTES = int(os.getenv('LESSON_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+    
+    # Insignias: 'sync' (en el request) o 'async' (cola en BD + scripts/badge_worker.py)
+    BADGE_EVALUATION_MODE = os.getenv('BADGE_EVALUATION_MODE', 'sync')
+    BADGE_WORKER_BATCH_SIZE = int(os.getenv('BADGE_WORKER_BATCH_SIZE', '200'))
+    BADGE_WORKER_POLL_SECONDS = float(os.getenv('BADGE_WORKER_POLL_SECONDS', '2'))
+    # Intentos antes de marcar un job como 'failed' (deja de tomarse)
+    BADGE_JOB_MAX_ATTEMPTS = int(os.getenv('BADGE_JOB_MAX_ATTEMPTS', '5'))
+    
     # ==========================================
     # SEGURIDAD Y TOKENS
     # ==========================================
@@ -25,12 +45,30 @@ class Config:
     if not SECRET_KEY:
         raise ValueError("❌ Error Crítico: No se encontró SECRET_KEY en las variables de entorno.")
     
+    # bcrypt: costo de los hashes (al cambiarlo, los hashes se regeneran en el siguiente login)
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+    # Hilos por worker para bcrypt y máximo de operaciones en espera antes de responder 503.
+    # gunicorn levanta 2*CPU+1 workers: con 1 hilo por worker ya hay más hilos que CPUs
+    BCRYPT_POOL_SIZE = int(os.getenv('BCRYPT_POOL_SIZE', '1'))
+    BCRYPT_MAX_PENDING = int(os.getenv('BCRYPT_MAX_PENDING', '8'))
+    
     # TOKENS CONFIGURADOS CORRECTAMENTE
     # Access Token: Corto por seguridad (se renueva automáticamente)
     ACCESS_TOKEN_EXPIRES = timedelta(hours=2)  # Aumentado a 2 horas
     
     # Refresh Token: Largo para mantener sesión (365 días = 1 año)
     REFRESH_TOKEN_EXPIRES = timedelta(days=365)
+    # Filas borradas por transacción al purgar tokens vencidos/revocados
+    REFRESH_TOKEN_PURGE_BATCH_SIZE = int(os.getenv('REFRESH_TOKEN_PURGE_BATCH_SIZE', '5000'))
+    
+    # Caché de access tokens ya verificados (por worker) y frecuencia máxima de
+    # consulta de revocaciones (logout / cambio de contraseña) en la BD
+    TOKEN_CACHE_MAX_ENTRIES = int(os.getenv('TOKEN_CACHE_MAX_ENTRIES', '10000'))
+    TOKEN_CACHE_TTL_SECONDS = int(os.getenv('TOKEN_CACHE_TTL_SECONDS', '300'))
+    TOKEN_REVOCATION_CHECK_SECONDS = float(os.getenv('TOKEN_REVOCATION_CHECK_SECONDS', '1'))
+    
+    # Clave para GET /api/internal/metrics (header X-Metrics-Token); sin clave el endpoint no existe
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
     
     # Configuración legacy (mantener por compatibilidad)
     JWT_EXPIRATION_HOURS = 24
@@ -45,6 +83,21 @@ class Config:
     if not GMAIL_USER or not GMAIL_APP_PASSWORD:
         print("⚠️ Advertencia: Credenciales de Gmail no configuradas. El envío de emails estará deshabilitado.")
     
+    # Servidor SMTP (para pruebas locales: SMTP_HOST=localhost SMTP_PORT=1025 SMTP_USE_TLS=false)
+    SMTP_HOST = os.getenv('SMTP_HOST', 'smtp.gmail.com')
+    SMTP_PORT = int(os.getenv('SMTP_PORT', '587'))
+    SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', 'true').lower() == 'true'
+    SMTP_TIMEOUT_SECONDS = float(os.getenv('SMTP_TIMEOUT_SECONDS', '10'))
+    
+    # Cola de correos (scripts/email_worker.py)
+    EMAIL_BATCH_SIZE = int(os.getenv('EMAIL_BATCH_SIZE', '20'))
+    EMAIL_MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', '6'))
+    EMAIL_WORKER_POLL_SECONDS = float(os.getenv('EMAIL_WORKER_POLL_SECONDS', '2'))
+    # Reserva de un lote en envío: si el worker muere, se reintenta al vencer
+    EMAIL_SEND_LEASE_SECONDS = int(os.getenv('EMAIL_SEND_LEASE_SECONDS', '300'))
+    # Días que se conservan los correos enviados o descartados
+    EMAIL_RETENTION_DAYS = int(os.getenv('EMAIL_RETENTION_DAYS', '30'))
+    
     # ==========================================
     # DOMINIOS ACADÉMICOS PERMITIDOS
     # ==========================================
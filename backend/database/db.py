@@ -13,12 +13,17 @@ Base = declarative_base()
 def get_session():
     return SessionLocal()
 
+def new_session():
+    """Sesión independiente de la sesión scoped del hilo (para cachés de proceso)."""
+    return SessionLocal.session_factory()
+
 # Todos los modelos aquí para que SQLAlchemy los registre
 from models.user import User
 from models.course import Course
 from models.lesson import Lesson
 from models.user_progress import UserCourseProgress, UserLessonProgress
 from models.refresh_token import RefreshToken
+from models.email_verification import EmailVerificationCode
 from models.user_badge import UserBadge
 from models.activity import Activity
 from models.badge import Badge
@@ -29,6 +34,14 @@ from models.password_reset_token import PasswordResetToken
 # ✅ NUEVO IMPORT
 from models.password_reset_code import PasswordResetCode
 from models.user_glossary_favorite import UserGlossaryFavorite
+from models.content_version import ContentVersion
+from models.content_tombstone import ContentTombstone
+from models.progress_sync_receipt import ProgressSyncReceipt
+from models.badge_job import BadgeJob
+from models.user_activity_day import UserActivityDay
+from models.leaderboard_entry import LeaderboardEntry
+from models.email_outbox import EmailOutbox
+from models.token_revocation import TokenRevocation
 from models.test_preference import (
     TestQuestion, Certification, Lab, LearningPath,
     RoleSkill, AcademicReference, TestResult, TestAnswer
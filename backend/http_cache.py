@@ -0,0 +1,103 @@
+# backend/http_cache.py
+import zlib
+from functools import wraps
+from flask import request, make_response, Response
+
+# Contenido igual para todos los usuarios: nginx y OkHttp pueden guardarlo un rato
+PUBLIC_CACHE = "public, max-age=60, must-revalidate"
+# Contenido por usuario: solo la caché del dispositivo, siempre revalidando con el ETag
+PRIVATE_CACHE = "private, no-cache"
+
+# Sufijo del ETag por codificación: cada variante comprimida es una representación distinta
+_ENCODING_SUFFIXES = {'br': 'br', 'gzip': 'gz'}
+
+def negotiate_encoding(offered):
+    """Codificación a usar entre las ofrecidas (br > gzip) según Accept-Encoding, o None."""
+    accepted = request.accept_encodings
+    for encoding in ('br', 'gzip'):
+        if encoding in offered and accepted[encoding]:
+            return encoding
+    return None
+
+def conditional_get(validators, cache_control=PRIVATE_CACHE, encodings=()):
+    """
+    Decorador de GET condicional (ETag / Last-Modified / 304).
+
+    `validators(*args, **kwargs)` recibe los mismos argumentos que la vista y
+    devuelve (etag, last_modified) calculados a partir de versiones de contenido,
+    o None para no usar caché. Si el cliente ya tiene esa versión se responde
+    304 sin ejecutar la vista (sin consultas ni serialización).
+
+    `encodings` son las codificaciones que la vista puede devolver (ver
+    encoded_response / streamed_response): el ETag lleva la codificación
+    negociada y tanto el 200 como el 304 llevan Vary: Accept-Encoding.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            result = validators(*args, **kwargs)
+            if result is None:
+                return f(*args, **kwargs)
+            etag, last_modified = result
+            encoding = negotiate_encoding(encodings)
+            if encoding:
+                etag = f"{etag}-{_ENCODING_SUFFIXES[encoding]}"
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            else:
+                not_modified = (
+                    last_modified is not None
+                    and request.if_modified_since is not None
+                    and last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+                )
+
+            if not_modified:
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = cache_control
+            if encodings:
+                response.vary.add('Accept-Encoding')
+            return response
+        return decorated
+    return decorator
+
+def encoded_response(body, gzip_body=None, brotli_body=None, mimetype='application/json'):
+    """Respuesta con la variante precomprimida que el cliente acepte (br > gzip > identidad)."""
+    offered = [e for e, b in (('br', brotli_body), ('gzip', gzip_body)) if b is not None]
+    encoding = negotiate_encoding(offered)
+    if encoding == 'br':
+        response = Response(brotli_body, mimetype=mimetype)
+        response.headers['Content-Encoding'] = 'br'
+    elif encoding == 'gzip':
+        response = Response(gzip_body, mimetype=mimetype)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(body, mimetype=mimetype)
+    response.vary.add('Accept-Encoding')
+    return response
+
+def streamed_response(chunks, mimetype='application/x-ndjson'):
+    """Respuesta en streaming; si el cliente acepta gzip se comprime al vuelo, trozo a trozo."""
+    if negotiate_encoding(('gzip',)) is None:
+        response = Response(chunks, mimetype=mimetype)
+    else:
+        def compressed():
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: formato gzip
+            for chunk in chunks:
+                data = compressor.compress(chunk)
+                if data:
+                    yield data
+            yield compressor.flush()
+
+        response = Response(compressed(), mimetype=mimetype)
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
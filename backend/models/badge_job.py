@@ -0,0 +1,24 @@
+# backend/models/badge_job.py
+from database.db import Base
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from datetime import datetime
+
+class BadgeJob(Base):
+    """
+    Evaluación de insignias pendiente (modo asíncrono).
+    Los workers la toman con SELECT ... FOR UPDATE SKIP LOCKED y la borran al procesarla.
+    Si falla se reintenta; tras BADGE_JOB_MAX_ATTEMPTS queda en 'failed' para revisarla a mano.
+    """
+    __tablename__ = 'badge_jobs'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    events = Column(String(100), nullable=False)     # eventos separados por coma: 'xp,lesson,course'
+    status = Column(String(20), default='pending', nullable=False)   # 'pending' | 'failed'
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(String(500))
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index('ix_badge_jobs_pending', 'id', postgresql_where=status == 'pending'),
+    )
@@ -0,0 +1,30 @@
+# backend/models/content_tombstone.py
+from database.db import Base
+from sqlalchemy import Column, Integer, String, DateTime, event, insert
+from datetime import datetime
+from models.glossary import Glossary
+from models.course import Course
+from models.lesson import Lesson
+
+class ContentTombstone(Base):
+    """Registro de contenido eliminado (glosario, cursos, lecciones) para la sincronización delta."""
+    __tablename__ = 'content_tombstones'
+
+    id = Column(Integer, primary_key=True)
+    entity = Column(String(20), nullable=False)      # 'glossary' | 'course' | 'lesson'
+    entity_id = Column(String(50), nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+def _record_deletion(entity):
+    def listener(mapper, connection, target):
+        connection.execute(insert(ContentTombstone).values(
+            entity=entity,
+            entity_id=str(target.id),
+            deleted_at=datetime.utcnow()
+        ))
+    return listener
+
+# Solo cubre session.delete(obj); los DELETE masivos (query.delete()) no disparan eventos
+event.listen(Glossary, 'after_delete', _record_deletion('glossary'))
+event.listen(Course, 'after_delete', _record_deletion('course'))
+event.listen(Lesson, 'after_delete', _record_deletion('lesson'))
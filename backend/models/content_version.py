@@ -0,0 +1,12 @@
+# backend/models/content_version.py
+from database.db import Base
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+
+class ContentVersion(Base):
+    """Sello de versión por tipo de contenido (glosario, cursos...). Se incrementa en cada carga."""
+    __tablename__ = 'content_versions'
+
+    scope = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,6 +1,7 @@
 # backend/models/course.py
 from database.db import Base
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
 
 class Course(Base):
     __tablename__ = 'courses'
@@ -9,4 +10,7 @@ class Course(Base):
     description = Column(String(500))
     level = Column(String(50))
     xp_reward = Column(Integer, default=0)
-    image_url = Column(String(500))
\ No newline at end of file
+    image_url = Column(String(500))
+
+    # Sincronización delta (apps offline)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
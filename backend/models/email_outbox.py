@@ -0,0 +1,29 @@
+# backend/models/email_outbox.py
+from database.db import Base
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from datetime import datetime
+
+class EmailOutbox(Base):
+    """
+    Correo pendiente de envío. El request solo inserta aquí; scripts/email_worker.py
+    lo envía reutilizando la conexión SMTP y reintenta con backoff si falla.
+    """
+    __tablename__ = 'email_outbox'
+
+    id = Column(Integer, primary_key=True)
+    to_email = Column(String(120), nullable=False)
+    subject = Column(String(200), nullable=False)
+    html_body = Column(Text, nullable=False)
+    text_body = Column(Text)
+    kind = Column(String(30))                              # 'verification' | 'welcome' | 'password_reset'
+    status = Column(String(20), default='pending', nullable=False)   # 'pending' | 'sending' | 'sent' | 'failed'
+    attempts = Column(Integer, default=0, nullable=False)
+    # Próximo intento; en 'sending' es el fin de la reserva del worker
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error = Column(String(500))
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime)
+
+    __table_args__ = (
+        Index('ix_email_outbox_due', 'next_attempt_at', postgresql_where=status.in_(('pending', 'sending'))),
+    )
@@ -1,8 +1,24 @@
 # backend/models/glossary.py
 from database.db import Base
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Computed, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
 from datetime import datetime
 
+# Vectores de búsqueda ponderados: término (A) > acrónimo (B) > definición (C) > ejemplo (D)
+SEARCH_ES_EXPRESSION = (
+    "setweight(to_tsvector('spanish', coalesce(term_es, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(acronym, '')), 'B') || "
+    "setweight(to_tsvector('spanish', coalesce(definition_es, '')), 'C') || "
+    "setweight(to_tsvector('spanish', coalesce(example_es, '')), 'D')"
+)
+SEARCH_EN_EXPRESSION = (
+    "setweight(to_tsvector('english', coalesce(term_en, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(acronym, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(definition_en, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(example_en, '')), 'D')"
+)
+
 class Glossary(Base):
     __tablename__ = 'glossary'
     
@@ -27,6 +43,16 @@ class Glossary(Base):
     where_you_hear_it = Column(String(255), nullable=True)
     
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+    # Búsqueda full-text (columnas generadas: Postgres las mantiene al escribir)
+    search_es = deferred(Column(TSVECTOR, Computed(SEARCH_ES_EXPRESSION, persisted=True)))
+    search_en = deferred(Column(TSVECTOR, Computed(SEARCH_EN_EXPRESSION, persisted=True)))
+
+    __table_args__ = (
+        Index('ix_glossary_search_es', 'search_es', postgresql_using='gin'),
+        Index('ix_glossary_search_en', 'search_en', postgresql_using='gin'),
+    )
 
     def to_dict(self):
         return {
@@ -0,0 +1,22 @@
+# backend/models/leaderboard_entry.py
+from database.db import Base
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from datetime import datetime
+
+class LeaderboardEntry(Base):
+    """
+    Ranking de XP precalculado (copia de users refrescada periódicamente).
+    Las consultas del ranking leen esta tabla, nunca users.
+    """
+    __tablename__ = 'leaderboard_entries'
+
+    user_id = Column(Integer, primary_key=True)
+    name = Column(String(100))
+    institution = Column(String(50))
+    total_xp = Column(Integer, nullable=False, default=0)
+    refreshed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index('ix_leaderboard_xp', total_xp.desc(), 'user_id'),
+        Index('ix_leaderboard_institution_xp', 'institution', total_xp.desc(), 'user_id'),
+    )
@@ -1,8 +1,9 @@
 # backend/models/lesson.py
 from database.db import Base
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
+from datetime import datetime
 
 class Lesson(Base):
     """
@@ -22,10 +23,11 @@ class Lesson(Base):
     description = Column(String(500))
     type = Column(String(50))  
     
-    content = Column(JSONB, nullable=False)  
+    # Cuerpo de la lección (pesado): diferido, solo se lee al servir la lección
+    content = deferred(Column(JSONB, nullable=False), group='body')
     
     # (Array de screens)
-    screens = Column(JSONB)  
+    screens = deferred(Column(JSONB), group='body')
     
     # Estadísticas
     total_screens = Column(Integer, default=0)
@@ -35,6 +37,9 @@ class Lesson(Base):
     # Ordenamiento
     order_index = Column(Integer, nullable=False)
     
+    # Sincronización delta (apps offline)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    
     
     course = relationship("Course", backref="lessons")
     
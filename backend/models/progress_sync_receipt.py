@@ -0,0 +1,22 @@
+# backend/models/progress_sync_receipt.py
+from database.db import Base
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from datetime import datetime
+
+class ProgressSyncReceipt(Base):
+    """
+    Recibo de un evento de progreso sincronizado desde la app (clave de idempotencia del cliente).
+    Si el cliente reintenta el mismo evento, se devuelve el resultado guardado sin aplicarlo de nuevo.
+    """
+    __tablename__ = 'progress_sync_receipts'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    idempotency_key = Column(String(100), nullable=False)
+    lesson_id = Column(String, nullable=False)
+    xp_earned = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'idempotency_key', name='unique_user_sync_key'),
+    )
@@ -1,20 +1,34 @@
 # backend/models/refresh_token.py
+import hashlib
 from database.db import Base
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, LargeBinary, DateTime, ForeignKey, Boolean, Index, text
 from datetime import datetime
 
 class RefreshToken(Base):
     __tablename__ = 'refresh_tokens'
+    __table_args__ = (
+        Index('ix_refresh_tokens_token_hash', 'token_hash', unique=True),
+        # Solo sesiones vigentes: revocar las de un usuario no recorre las ya revocadas
+        Index('ix_refresh_tokens_active_user', 'user_id', postgresql_where=text('NOT revoked')),
+        # Purga en lotes: vencidos por rango de fecha y revocados por el índice parcial
+        Index('ix_refresh_tokens_expires_at', 'expires_at'),
+        Index('ix_refresh_tokens_revoked', 'id', postgresql_where=text('revoked')),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
-    token = Column(String(512), unique=True, nullable=False)  # JWT 
+    # SHA-256 del JWT (32 bytes): el token completo nunca se guarda
+    token_hash = Column(LargeBinary(32), nullable=False)
     expires_at = Column(DateTime, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
-    revoked = Column(Boolean, default=False)
+    revoked = Column(Boolean, default=False, server_default='false')
+
+    @staticmethod
+    def hash_token(token: str) -> bytes:
+        return hashlib.sha256(token.encode('utf-8')).digest()
 
     def is_expired(self):
         return datetime.utcnow() > self.expires_at
 
     def is_revoked(self):
-        return self.revoked
\ No newline at end of file
+        return self.revoked
@@ -0,0 +1,18 @@
+# backend/models/token_revocation.py
+from database.db import Base
+from sqlalchemy import Column, Integer, LargeBinary, DateTime, ForeignKey
+from datetime import datetime
+
+class TokenRevocation(Base):
+    """
+    Access tokens invalidados antes de su 'exp' (logout, cambio de contraseña).
+    Con token_hash: solo ese token. Sin token_hash: todos los tokens del usuario
+    emitidos antes de created_at. La fila sirve hasta expires_at y luego se purga.
+    """
+    __tablename__ = 'token_revocations'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    token_hash = Column(LargeBinary(32))
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
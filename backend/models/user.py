@@ -16,6 +16,8 @@ class User(Base):
     terms_accepted_at = Column(DateTime, nullable=True)
     
     # Campos de gamificación
+    # (current_streak/max_streak/last_activity_date ya no se actualizan: la racha se
+    # calcula desde user_activity_days, ver StreakService)
     total_xp = Column(Integer, default=0)
     current_streak = Column(Integer, default=0)
     max_streak = Column(Integer, default=0)
@@ -39,7 +41,12 @@ class User(Base):
     
     def get_institution(self):
         """Retorna la institución del usuario si es académico."""
-        if '@uni.pe' in self.email:
+        return User.institution_for_email(self.email)
+
+    @staticmethod
+    def institution_for_email(email):
+        """Institución a partir del correo (sin instanciar el usuario, p. ej. para el ranking)."""
+        if email and '@uni.pe' in email:
             return 'UNI'
         return None
 
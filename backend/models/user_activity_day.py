@@ -0,0 +1,10 @@
+# backend/models/user_activity_day.py
+from database.db import Base
+from sqlalchemy import Column, Integer, Date, ForeignKey
+
+class UserActivityDay(Base):
+    """Un registro por usuario y día con actividad (la racha se calcula a partir de aquí)."""
+    __tablename__ = 'user_activity_days'
+
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    day = Column(Date, primary_key=True)
@@ -1,12 +1,15 @@
 # backend/models/user_badge.py
 from database.db import Base
-from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Boolean, UniqueConstraint
 from datetime import datetime
 
 class UserBadge(Base):
     __tablename__ = 'user_badges'
+    __table_args__ = (UniqueConstraint('user_id', 'badge_id', name='unique_user_badge'),)
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
     badge_id = Column(Integer, ForeignKey('badges.id'), nullable=False)
     earned_at = Column(DateTime, default=datetime.utcnow)
-    earned_value = Column(Integer, default=1)
\ No newline at end of file
+    earned_value = Column(Integer, default=1)
+    # Otorgada en segundo plano y aún no mostrada al usuario
+    pending = Column(Boolean, default=False, nullable=False, server_default='false')
\ No newline at end of file
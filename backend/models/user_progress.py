@@ -16,6 +16,10 @@ class UserCourseProgress(Base):
     completed_at = Column(DateTime, nullable=True)  
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Un registro por usuario y curso (destino del upsert de progreso)
+    __table_args__ = (
+        UniqueConstraint('user_id', 'course_id', name='unique_user_course'),
+    )
     
     user = relationship("User", backref="course_progress")
     course = relationship("Course")
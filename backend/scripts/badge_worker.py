@@ -0,0 +1,33 @@
+# backend/scripts/badge_worker.py
+"""
+Worker de insignias (BADGE_EVALUATION_MODE=async).
+Toma lotes de la tabla badge_jobs y otorga las insignias con las mismas reglas del modo sync.
+Se pueden correr varias instancias: SKIP LOCKED reparte los jobs entre ellas.
+Los jobs que fallan BADGE_JOB_MAX_ATTEMPTS veces quedan en badge_jobs con status 'failed'.
+"""
+import sys
+import os
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from database.db import create_all
+from services.badge_service import BadgeService
+
+def run_worker():
+    create_all()
+    badge_service = BadgeService()
+    print(f"🏅 Worker de insignias iniciado (lotes de {Config.BADGE_WORKER_BATCH_SIZE}).")
+    while True:
+        try:
+            processed = badge_service.process_jobs()
+        except Exception as e:
+            print(f"❌ Error procesando insignias: {e}")
+            processed = 0
+        if processed:
+            print(f"   ✅ {processed} jobs procesados")
+        else:
+            time.sleep(Config.BADGE_WORKER_POLL_SECONDS)
+
+if __name__ == '__main__':
+    run_worker()
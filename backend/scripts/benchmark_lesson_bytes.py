@@ -0,0 +1,48 @@
+# backend/scripts/benchmark_lesson_bytes.py
+"""
+Bytes leídos de Postgres por lección: fila completa vs. solo metadatos.
+Muestra cuánto se ahorra en las rutas de listado y bloqueo al diferir content/screens.
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text
+from database.db import engine
+
+# Columnas que leen las rutas calientes (listado, chequeo de bloqueo, completar lección)
+METADATA_COLUMNS = (
+    "id", "course_id", "title", "description", "type", "total_screens",
+    "duration_minutes", "xp_reward", "order_index", "updated_at"
+)
+
+def run_benchmark():
+    if engine.dialect.name != 'postgresql':
+        print("⚠️ Este benchmark usa pg_column_size(): ejecútalo contra Postgres.")
+        return
+
+    metadata_row = ", ".join(f"l.{column}" for column in METADATA_COLUMNS)
+    with engine.connect() as connection:
+        row = connection.execute(text(f"""
+            SELECT count(*) AS lessons,
+                   coalesce(sum(pg_column_size(l.*)), 0) AS full_bytes,
+                   coalesce(sum(pg_column_size(row({metadata_row}))), 0) AS metadata_bytes,
+                   coalesce(max(pg_column_size(l.*)), 0) AS max_full_bytes
+            FROM lessons l
+        """)).one()
+
+    if not row.lessons:
+        print("No hay lecciones cargadas.")
+        return
+
+    per_lesson_full = row.full_bytes / row.lessons
+    per_lesson_meta = row.metadata_bytes / row.lessons
+    print(f"📚 Lecciones: {row.lessons}")
+    print(f"   Fila completa:   {per_lesson_full:,.0f} bytes/lección (máx {row.max_full_bytes:,})")
+    print(f"   Solo metadatos:  {per_lesson_meta:,.0f} bytes/lección")
+    print(f"   Ahorro por lección leída: {1 - per_lesson_meta / per_lesson_full:.1%}")
+    print(f"   Listado de un curso (todas las lecciones): "
+          f"{row.full_bytes:,} -> {row.metadata_bytes:,} bytes en total")
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,46 @@
+# backend/scripts/email_worker.py
+"""
+Worker de correos: envía la cola email_outbox reutilizando la conexión SMTP.
+Para probar sin Gmail, levantar un SMTP local y apuntar el worker a él:
+    python -m aiosmtpd -n -l localhost:1025
+    SMTP_HOST=localhost SMTP_PORT=1025 SMTP_USE_TLS=false python scripts/email_worker.py
+"""
+import sys
+import os
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from database.db import create_all
+from services.email_sender import EmailSender, purge_email_outbox
+
+# Cada cuánto se borran los correos viejos ya enviados o descartados
+PURGE_INTERVAL_SECONDS = 3600
+
+def run_worker():
+    create_all()
+    sender = EmailSender()
+    print(f"📧 Worker de correos iniciado ({Config.SMTP_HOST}:{Config.SMTP_PORT}).")
+    last_purge = 0
+    while True:
+        if time.monotonic() - last_purge >= PURGE_INTERVAL_SECONDS:
+            try:
+                purged = purge_email_outbox()
+                if purged:
+                    print(f"🧹 {purged} correos antiguos eliminados de la cola.")
+            except Exception as e:
+                print(f"❌ Error purgando la cola de correos: {e}")
+            last_purge = time.monotonic()
+        try:
+            processed = sender.send_batch()
+        except Exception as e:
+            print(f"❌ Error procesando la cola de correos: {e}")
+            sender.close()
+            processed = 0
+        if not processed:
+            # Cola vacía: no mantener la conexión SMTP abierta mientras se espera
+            sender.close()
+            time.sleep(Config.EMAIL_WORKER_POLL_SECONDS)
+
+if __name__ == '__main__':
+    run_worker()
@@ -10,6 +10,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from database.db import get_session, create_all
 from models.glossary import Glossary
+from services.content_version_service import bump_content_version, GLOSSARY_SCOPE
 
 # --- CONFIGURACIÓN ---
 MAX_TERMS = 1000  # Límite de seguridad, ajústalo si tienes más términos
@@ -84,6 +85,8 @@ def load_terms_from_json(session, terms_data):
     # Confirmar cambios si hubo inserciones
     if count > 0:
         try:
+            # Invalida los catálogos en memoria de los workers
+            bump_content_version(session, GLOSSARY_SCOPE)
             session.commit()
             print("💾 Base de datos actualizada con éxito.")
         except Exception as e:
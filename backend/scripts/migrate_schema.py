@@ -0,0 +1,98 @@
+# backend/scripts/migrate_schema.py
+"""
+Migraciones idempotentes para bases ya creadas.
+create_all() solo crea tablas nuevas: las columnas e índices agregados a tablas
+existentes se aplican aquí. Se puede ejecutar varias veces sin efectos.
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text
+from database.db import engine, create_all
+from models.glossary import SEARCH_ES_EXPRESSION, SEARCH_EN_EXPRESSION
+
+MIGRATIONS = [
+    # --- Búsqueda full-text del glosario ---
+    f"ALTER TABLE glossary ADD COLUMN IF NOT EXISTS search_es tsvector GENERATED ALWAYS AS ({SEARCH_ES_EXPRESSION}) STORED",
+    f"ALTER TABLE glossary ADD COLUMN IF NOT EXISTS search_en tsvector GENERATED ALWAYS AS ({SEARCH_EN_EXPRESSION}) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_glossary_search_es ON glossary USING gin (search_es)",
+    "CREATE INDEX IF NOT EXISTS ix_glossary_search_en ON glossary USING gin (search_en)",
+
+    # --- Búsqueda difusa (trigramas) ---
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_glossary_term_es_trgm ON glossary USING gin (lower(term_es) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_glossary_term_en_trgm ON glossary USING gin (lower(term_en) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_glossary_acronym_trgm ON glossary USING gin (lower(acronym) gin_trgm_ops)",
+
+    # --- Sincronización delta (updated_at) ---
+    "ALTER TABLE glossary ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc')",
+    "ALTER TABLE glossary ALTER COLUMN updated_at SET DEFAULT (now() AT TIME ZONE 'utc')",
+    "ALTER TABLE courses ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc')",
+    "ALTER TABLE courses ALTER COLUMN updated_at SET DEFAULT (now() AT TIME ZONE 'utc')",
+    "ALTER TABLE lessons ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc')",
+    "ALTER TABLE lessons ALTER COLUMN updated_at SET DEFAULT (now() AT TIME ZONE 'utc')",
+    "CREATE INDEX IF NOT EXISTS ix_glossary_updated_at ON glossary (updated_at)",
+    "CREATE INDEX IF NOT EXISTS ix_courses_updated_at ON courses (updated_at)",
+    "CREATE INDEX IF NOT EXISTS ix_lessons_updated_at ON lessons (updated_at)",
+
+    # --- Progreso de cursos: un registro por usuario y curso (upsert atómico) ---
+    """DELETE FROM user_course_progress p USING user_course_progress d
+       WHERE p.user_id = d.user_id AND p.course_id = d.course_id
+         AND (p.completed_lessons, p.id) < (d.completed_lessons, d.id)""",
+    "CREATE UNIQUE INDEX IF NOT EXISTS unique_user_course ON user_course_progress (user_id, course_id)",
+
+    # --- Insignias en segundo plano (pendientes de mostrar) ---
+    "ALTER TABLE user_badges ADD COLUMN IF NOT EXISTS pending BOOLEAN NOT NULL DEFAULT false",
+    "CREATE INDEX IF NOT EXISTS ix_user_badges_pending ON user_badges (user_id) WHERE pending",
+    # Una insignia por usuario (se conserva la primera otorgada)
+    """DELETE FROM user_badges b USING user_badges d
+       WHERE b.user_id = d.user_id AND b.badge_id = d.badge_id AND b.id > d.id""",
+    "CREATE UNIQUE INDEX IF NOT EXISTS unique_user_badge ON user_badges (user_id, badge_id)",
+    # Jobs que fallan: reintentos contados y estado 'failed' al agotarlos
+    "ALTER TABLE badge_jobs ADD COLUMN IF NOT EXISTS status VARCHAR(20) NOT NULL DEFAULT 'pending'",
+    "ALTER TABLE badge_jobs ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE badge_jobs ADD COLUMN IF NOT EXISTS last_error VARCHAR(500)",
+    "CREATE INDEX IF NOT EXISTS ix_badge_jobs_pending ON badge_jobs (id) WHERE status = 'pending'",
+
+    # --- Rachas: días de actividad a partir de la racha guardada en users ---
+    """INSERT INTO user_activity_days (user_id, day)
+       SELECT u.id, u.last_activity_date - g.n
+       FROM users u CROSS JOIN LATERAL generate_series(0, greatest(coalesce(u.current_streak, 1), 1) - 1) AS g(n)
+       WHERE u.last_activity_date IS NOT NULL
+       ON CONFLICT DO NOTHING""",
+
+    # --- Cola de correos: reservas en estado 'sending' ---
+    "DROP INDEX IF EXISTS ix_email_outbox_pending",
+    "CREATE INDEX IF NOT EXISTS ix_email_outbox_due ON email_outbox (next_attempt_at) WHERE status IN ('pending', 'sending')",
+
+    # --- Refresh tokens: hash SHA-256 en lugar del JWT completo ---
+    "ALTER TABLE refresh_tokens ADD COLUMN IF NOT EXISTS token_hash BYTEA",
+    """DO $$ BEGIN
+         IF EXISTS (SELECT 1 FROM information_schema.columns
+                    WHERE table_name = 'refresh_tokens' AND column_name = 'token') THEN
+           DELETE FROM refresh_tokens WHERE revoked OR expires_at < (now() AT TIME ZONE 'utc');
+           UPDATE refresh_tokens SET token_hash = sha256(convert_to(token, 'UTF8')) WHERE token_hash IS NULL;
+           ALTER TABLE refresh_tokens DROP COLUMN token;
+         END IF;
+       END $$""",
+    "ALTER TABLE refresh_tokens ALTER COLUMN token_hash SET NOT NULL",
+    "ALTER TABLE refresh_tokens ALTER COLUMN revoked SET DEFAULT false",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_refresh_tokens_token_hash ON refresh_tokens (token_hash)",
+    "CREATE INDEX IF NOT EXISTS ix_refresh_tokens_active_user ON refresh_tokens (user_id) WHERE NOT revoked",
+    "CREATE INDEX IF NOT EXISTS ix_refresh_tokens_expires_at ON refresh_tokens (expires_at)",
+    "CREATE INDEX IF NOT EXISTS ix_refresh_tokens_revoked ON refresh_tokens (id) WHERE revoked",
+]
+
+def run_migrations():
+    print("🔧 Aplicando migraciones de esquema...")
+    create_all()
+    with engine.connect() as connection:
+        with connection.begin():
+            for statement in MIGRATIONS:
+                print(f"   - {statement[:90]}...")
+                connection.execute(text(statement))
+    print("✅ Migraciones aplicadas.")
+
+if __name__ == '__main__':
+    run_migrations()
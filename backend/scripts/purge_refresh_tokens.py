@@ -0,0 +1,21 @@
+# backend/scripts/purge_refresh_tokens.py
+"""
+Borra refresh tokens vencidos o revocados (tabla refresh_tokens) en lotes
+y las revocaciones de access tokens que ya vencieron (tabla token_revocations).
+Pensado para ejecutarse periódicamente (deployment/cyberlearn-token-purge.timer).
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database.db import create_all
+from services.auth_service import purge_refresh_tokens
+from services.token_cache import purge_token_revocations
+
+if __name__ == '__main__':
+    create_all()
+    print("🧹 Purgando refresh tokens vencidos o revocados...")
+    total = purge_refresh_tokens()
+    print(f"✅ Purga completada: {total} tokens eliminados.")
+    total = purge_token_revocations()
+    print(f"✅ Revocaciones vencidas eliminadas: {total}.")
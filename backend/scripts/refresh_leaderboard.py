@@ -0,0 +1,17 @@
+# backend/scripts/refresh_leaderboard.py
+"""
+Refresca el ranking de XP (tabla leaderboard_entries).
+Pensado para ejecutarse periódicamente (deployment/cyberlearn-leaderboard.timer).
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database.db import create_all
+from services.leaderboard_service import refresh_leaderboard
+
+if __name__ == '__main__':
+    create_all()
+    print("🏆 Refrescando ranking de XP...")
+    total = refresh_leaderboard()
+    print(f"✅ Ranking actualizado: {total} usuarios.")
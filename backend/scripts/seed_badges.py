@@ -4,6 +4,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from database.db import get_session
 from models.badge import Badge
+from services.content_version_service import bump_content_version, BADGES_SCOPE
 
 def seed_badges():
     session = get_session()
@@ -132,6 +133,8 @@ def seed_badges():
             exists.trigger_value = b["val"]
             print(f"   🔄 Badge actualizado: {b['name']}")
             
+    # Los workers recargan su catálogo de insignias
+    bump_content_version(session, BADGES_SCOPE)
     session.commit()
     session.close()
     print("✨ Sistema de Badges listo.")
@@ -8,6 +8,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from database.db import get_session
 from models.course import Course
 from models.lesson import Lesson
+from services.content_version_service import bump_content_version, COURSES_SCOPE
 
 DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../data/courses'))
 
@@ -148,6 +149,8 @@ def seed_courses():
                 else:
                     print(f"   ❌ FALTA ARCHIVO JSON para lección {i} del curso {course_num}")
         
+        # Invalida cachés y ETags de cursos/lecciones
+        bump_content_version(session, COURSES_SCOPE)
         session.commit()
         print("\n✨ Base de datos actualizada con éxito (Black Edition Ready).")
 
@@ -4,6 +4,7 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from database.db import get_session
+from services.content_version_service import bump_content_version, TEST_PREFERENCE_SCOPE
 from models.test_preference import (
     TestQuestion, Certification, Lab, LearningPath,
     RoleSkill, AcademicReference
@@ -549,6 +550,14 @@ def seed_all():
     seed_skills()
     seed_academic_references()
     
+    # Invalida cachés y ETags del test
+    session = get_session()
+    try:
+        bump_content_version(session, TEST_PREFERENCE_SCOPE)
+        session.commit()
+    finally:
+        session.close()
+    
     print("=" * 60)
     print("✨ ¡Seed completado exitosamente!")
     print("\n📊 Resumen:")
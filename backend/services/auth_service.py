@@ -1,12 +1,14 @@
 # backend/services/auth_service.py
-from database.db import get_session
+from database.db import get_session, new_session
 from models.user import User
 from models.refresh_token import RefreshToken
 from models.email_verification import EmailVerificationCode
 from services.email_service import EmailService
-import bcrypt
+from services.password_hasher import hash_password, verify_password, needs_rehash, PasswordHasherBusy
+from services.token_cache import revoke_access_token
 import jwt
 import re
+import secrets
 from datetime import datetime, timedelta, timezone
 from config import Config
 
@@ -24,12 +26,23 @@ class AuthService:
             "user_id": user_id,
             "exp": expire,
             "iat": datetime.now(timezone.utc),
+            # Identificador único: dos tokens emitidos en el mismo segundo no comparten hash
+            "jti": secrets.token_hex(8),
         }
         if is_refresh:
             payload["type"] = "refresh"
         
         return jwt.encode(payload, self.secret_key, algorithm="HS256"), expire
 
+    @staticmethod
+    def _store_refresh_token(session, user_id: int, token: str, expire: datetime):
+        """Registra el refresh token por su hash SHA-256 (expires_at en UTC sin zona)."""
+        session.add(RefreshToken(
+            user_id=user_id,
+            token_hash=RefreshToken.hash_token(token),
+            expires_at=expire.replace(tzinfo=None)
+        ))
+
     def _validate_email(self, email: str):
         """Valida formato de email."""
         pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
@@ -69,13 +82,13 @@ class AuthService:
             if existing:
                 raise ValueError("Este correo ya está registrado")
 
-            # 3. Hash de la contraseña
-            password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+            # 3. Hash de la contraseña (en el pool de bcrypt, sin bloquear el worker)
+            password_hash = hash_password(password)
 
             # 4. Crear usuario (sin verificar todavía)
             user = User(
                 email=email,
-                password_hash=password_hash.decode('utf-8'),
+                password_hash=password_hash,
                 name=name,
                 email_verified=False,
                 terms_accepted_at=datetime.utcnow()
@@ -145,13 +158,7 @@ class AuthService:
             access_token, _ = self._create_token(user.id, self.access_expires)
             refresh_token, refresh_expire = self._create_token(user.id, self.refresh_expires, is_refresh=True)
 
-            refresh_expire_naive = refresh_expire.replace(tzinfo=None)
-            rt = RefreshToken(
-                user_id=user.id,
-                token=refresh_token,
-                expires_at=refresh_expire_naive
-            )
-            session.add(rt)
+            self._store_refresh_token(session, user.id, refresh_token, refresh_expire)
             session.commit()
             
             try:
@@ -218,23 +225,24 @@ class AuthService:
             email = email.lower()
             user = session.query(User).filter_by(email=email).first()
             
-            if not user or not bcrypt.checkpw(password.encode('utf-8'), user.password_hash.encode('utf-8')):
+            if not user or not verify_password(password, user.password_hash):
                 raise ValueError("Credenciales inválidas")
             
             if not user.email_verified:
                 raise ValueError("Debes verificar tu email antes de iniciar sesión")
 
+            # Si cambió BCRYPT_ROUNDS, regenerar el hash ahora que tenemos la contraseña
+            if needs_rehash(user.password_hash):
+                try:
+                    user.password_hash = hash_password(password)
+                except PasswordHasherBusy:
+                    pass  # Se reintentará en el próximo login
+
             # GENERAR TOKENS CON LOS NUEVOS TIEMPOS
             access_token, _ = self._create_token(user.id, self.access_expires)
             refresh_token, refresh_expire = self._create_token(user.id, self.refresh_expires, is_refresh=True)
 
-            refresh_expire_naive = refresh_expire.replace(tzinfo=None)
-            rt = RefreshToken(
-                user_id=user.id,
-                token=refresh_token,
-                expires_at=refresh_expire_naive
-            )
-            session.add(rt)
+            self._store_refresh_token(session, user.id, refresh_token, refresh_expire)
             session.commit()
 
             return {
@@ -255,7 +263,11 @@ class AuthService:
         """Renovar tokens."""
         session = get_session()
         try:
-            rt = session.query(RefreshToken).filter_by(token=refresh_token_str).first()
+            rt = None
+            if refresh_token_str:
+                rt = session.query(RefreshToken).filter_by(
+                    token_hash=RefreshToken.hash_token(refresh_token_str)
+                ).first()
             
             if not rt:
                 raise ValueError("Token no encontrado")
@@ -278,14 +290,7 @@ class AuthService:
             new_access, _ = self._create_token(payload["user_id"], self.access_expires)
             new_refresh, new_expire = self._create_token(payload["user_id"], self.refresh_expires, True)
             
-            new_expire_naive = new_expire.replace(tzinfo=None)
-            new_rt = RefreshToken(
-                user_id=payload["user_id"], 
-                token=new_refresh, 
-                expires_at=new_expire_naive
-            )
-            
-            session.add(new_rt)
+            self._store_refresh_token(session, payload["user_id"], new_refresh, new_expire)
             session.commit()
 
             return {
@@ -299,9 +304,51 @@ class AuthService:
         """Revocar token de refresco."""
         session = get_session()
         try:
-            rt = session.query(RefreshToken).filter_by(token=token_str).first()
+            if not token_str:
+                return
+            rt = session.query(RefreshToken).filter_by(
+                token_hash=RefreshToken.hash_token(token_str)
+            ).first()
             if rt:
                 rt.revoked = True
                 session.commit()
         finally:
-            session.close()
\ No newline at end of file
+            session.close()
+
+    def revoke_access_token(self, user_id: int, token_str: str):
+        """Invalida el access token del logout en todos los workers (antes de su 'exp')."""
+        session = get_session()
+        try:
+            revoke_access_token(session, user_id, token_str)
+            session.commit()
+        finally:
+            session.close()
+
+def purge_refresh_tokens(batch_size=None):
+    """
+    Borra refresh tokens vencidos o revocados en lotes (una transacción corta por lote).
+    Se ejecuta desde scripts/purge_refresh_tokens.py; devuelve cuántas filas se borraron.
+    Una pasada por criterio: cada lote sale de su índice (parcial WHERE revoked / expires_at)
+    en lugar de recorrer la tabla completa con un OR.
+    """
+    batch_size = batch_size or Config.REFRESH_TOKEN_PURGE_BATCH_SIZE
+    criteria = (RefreshToken.revoked == True, RefreshToken.expires_at < datetime.utcnow())
+    total = 0
+    session = new_session()
+    try:
+        for criterion in criteria:
+            while True:
+                ids = session.query(RefreshToken.id).filter(criterion).limit(batch_size).scalar_subquery()
+                deleted = session.query(RefreshToken).filter(
+                    RefreshToken.id.in_(ids)
+                ).delete(synchronize_session=False)
+                session.commit()
+                total += deleted
+                if deleted < batch_size:
+                    break
+        return total
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
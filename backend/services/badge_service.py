@@ -1,11 +1,65 @@
-# backend/services/badge_service.py - NO CAMBIOS NECESARIOS
-from database.db import get_session
+# backend/services/badge_service.py
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+from database.db import get_session, new_session
 from models.badge import Badge
 from models.user_badge import UserBadge
 from models.user import User
 from models.user_progress import UserCourseProgress, UserLessonProgress
+from models.badge_job import BadgeJob
+from services.content_version_service import get_content_version, BADGES_SCOPE
+from services.streak_service import StreakService
+from sqlalchemy import exists, update, case
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from config import Config
 from datetime import datetime
 
+# Eventos que disparan la evaluación de insignias
+XP_EVENT = 'xp'                 # cambió el XP total
+LESSON_EVENT = 'lesson'         # se completó una lección
+COURSE_EVENT = 'course'         # se completó un curso
+STREAK_EVENT = 'streak'         # cambió la racha
+ALL_EVENTS = frozenset({XP_EVENT, LESSON_EVENT, COURSE_EVENT, STREAK_EVENT})
+
+BadgeRule = namedtuple('BadgeRule', 'id name value')
+
+class BadgeCatalog:
+    """Snapshot inmutable de las insignias, indexado por trigger_type (una carga por versión)."""
+
+    def __init__(self, version, badges):
+        self.version = version
+        by_trigger = {}
+        for badge in sorted(badges, key=lambda b: b.id):
+            value = badge.trigger_value
+            by_trigger.setdefault(badge.trigger_type, []).append(BadgeRule(
+                badge.id, badge.name, int(value) if value and value.isdigit() else value
+            ))
+        self.by_trigger = MappingProxyType({k: tuple(v) for k, v in by_trigger.items()})
+
+    def rules(self, trigger_type):
+        return self.by_trigger.get(trigger_type, ())
+
+_catalog = None
+_lock = threading.Lock()
+
+def get_badge_catalog():
+    """Devuelve el catálogo vigente; lo recarga si cambió la versión de las insignias en la BD."""
+    global _catalog
+    version = get_content_version(BADGES_SCOPE)
+    catalog = _catalog
+    if catalog is not None and catalog.version == version:
+        return catalog
+
+    with _lock:
+        if _catalog is None or _catalog.version != version:
+            session = new_session()
+            try:
+                _catalog = BadgeCatalog(version, session.query(Badge).all())
+            finally:
+                session.close()
+        return _catalog
+
 class BadgeService:
     def get_user_badges(self, user_id):
         session = get_session()
@@ -24,59 +78,165 @@ class BadgeService:
         finally:
             session.close()
 
-    
-    def check_and_award_badges(self, user_id, session):
-        """Revisa si el usuario merece nuevos badges y los otorga. (Usa sesión existente)"""
-        new_badges = []
-        user = session.query(User).get(user_id)
-        if not user: return []
-
-        xp_badges = session.query(Badge).filter_by(trigger_type='xp_milestone').all()
-        for badge in xp_badges:
-            if user.total_xp >= int(badge.trigger_value):
-                if self._award(user_id, badge, session):
-                    new_badges.append(badge.name)
-
-        # Badges de Lecciones 
-        total_lessons = session.query(UserLessonProgress).filter_by(user_id=user_id, completed=True).count()
-        if total_lessons >= 1:
-            first_badge = session.query(Badge).filter_by(trigger_type='first_lesson').first()
-            if first_badge and self._award(user_id, first_badge, session):
-                new_badges.append(first_badge.name)
-
-        # Badges de Cursos Completados 
-        completed_courses = session.query(UserCourseProgress).filter_by(user_id=user_id, percentage=100).all()
-        for cp in completed_courses:
-            
-            c_badge = session.query(Badge).filter_by(
-                trigger_type='course_completed', 
-                trigger_value=str(cp.course_id)
-            ).first()
-            if c_badge and self._award(user_id, c_badge, session):
-                new_badges.append(c_badge.name)
-
-        # Badge Maestro (Todos los cursos básicos)
-    
-        if len(completed_courses) >= 5:
-            master_badge = session.query(Badge).filter_by(trigger_type='all_basic_courses').first()
-            if master_badge and self._award(user_id, master_badge, session):
-                new_badges.append(master_badge.name)
-
-        # 5. Badges de Racha (Streak)
-        streak_badges = session.query(Badge).filter_by(trigger_type='streak').all()
-        for badge in streak_badges:
-            if user.current_streak >= int(badge.trigger_value):
-                if self._award(user_id, badge, session):
-                    new_badges.append(badge.name)
-
-        return new_badges
-
-    def _award(self, user_id, badge, session):
-        """Helper privado para insertar si no existe"""
-        exists = session.query(UserBadge).filter_by(user_id=user_id, badge_id=badge.id).first()
-        if not exists:
-            print(f"🏆 ¡Badge Otorgado! Usuario {user_id} ganó: {badge.name}")
-            new_ub = UserBadge(user_id=user_id, badge_id=badge.id, earned_at=datetime.utcnow())
-            session.add(new_ub)
-            return True
-        return False
\ No newline at end of file
+    def _candidates(self, user_id, session, events):
+        """Reglas que el usuario cumple, evaluando solo las afectadas por los eventos."""
+        catalog = get_badge_catalog()
+        candidates = []
+
+        if events & {XP_EVENT, LESSON_EVENT}:
+            # XP y "¿completó alguna lección?" en una sola consulta
+            stats = session.query(
+                User.total_xp,
+                exists().where(
+                    UserLessonProgress.user_id == user_id,
+                    UserLessonProgress.completed == True
+                ).label('has_lesson')
+            ).filter(User.id == user_id).first()
+            if not stats:
+                return []
+
+            if XP_EVENT in events:
+                candidates += [r for r in catalog.rules('xp_milestone') if (stats.total_xp or 0) >= r.value]
+            if LESSON_EVENT in events and stats.has_lesson:
+                candidates += catalog.rules('first_lesson')[:1]
+
+        if STREAK_EVENT in events and catalog.rules('streak'):
+            current_streak = StreakService().get_current_streak(user_id, session=session)
+            candidates += [r for r in catalog.rules('streak') if current_streak >= r.value]
+
+        if COURSE_EVENT in events:
+            completed_courses = {
+                course_id for (course_id,) in session.query(UserCourseProgress.course_id).filter_by(
+                    user_id=user_id, percentage=100
+                ).all()
+            }
+            candidates += [r for r in catalog.rules('course_completed') if r.value in completed_courses]
+            # Badge Maestro (Todos los cursos básicos)
+            candidates += [r for r in catalog.rules('all_basic_courses')[:1] if len(completed_courses) >= r.value]
+
+        return candidates
+
+    def check_and_award_badges(self, user_id, session, events=ALL_EVENTS, pending=False):
+        """
+        Revisa si el usuario merece nuevos badges y los otorga. (Usa sesión existente)
+        Solo se evalúan las reglas de los eventos indicados; la propiedad se verifica con
+        un único IN y las nuevas insignias se insertan juntas (sin duplicar ante carreras).
+        Con pending=True quedan marcadas para que el cliente las recoja después.
+        """
+        candidates = self._candidates(user_id, session, frozenset(events))
+        if not candidates:
+            return []
+
+        owned = {
+            badge_id for (badge_id,) in session.query(UserBadge.badge_id).filter(
+                UserBadge.user_id == user_id,
+                UserBadge.badge_id.in_([r.id for r in candidates])
+            ).all()
+        }
+        earned = [r for r in candidates if r.id not in owned]
+        if not earned:
+            return []
+
+        # ON CONFLICT: si otra evaluación concurrente (request o worker) ya la otorgó, se omite
+        now = datetime.utcnow()
+        inserted = set(session.execute(
+            pg_insert(UserBadge).values([
+                {"user_id": user_id, "badge_id": r.id, "earned_at": now, "pending": pending} for r in earned
+            ]).on_conflict_do_nothing(index_elements=['user_id', 'badge_id']).returning(UserBadge.badge_id)
+        ).scalars())
+        earned = [r for r in earned if r.id in inserted]
+        for r in earned:
+            print(f"🏆 ¡Badge Otorgado! Usuario {user_id} ganó: {r.name}")
+        return [r.name for r in earned]
+
+    def evaluate(self, user_id, session, events):
+        """
+        Punto de entrada desde el progreso: evalúa ahora (modo sync) o encola un job
+        para el worker (modo async). En modo async devuelve [] y las insignias llegan
+        después por /api/user/badges/pending. Ambos modos usan las mismas reglas.
+        """
+        if not events:
+            return []
+        if Config.BADGE_EVALUATION_MODE == 'async':
+            session.add(BadgeJob(user_id=user_id, events=",".join(sorted(events))))
+            return []
+        return self.check_and_award_badges(user_id, session, events)
+
+    def process_jobs(self, batch_size=None):
+        """
+        Procesa un lote de la cola (worker). Varios workers pueden correr a la vez:
+        SKIP LOCKED hace que cada uno tome filas distintas. Devuelve cuántos jobs procesó.
+        Cada usuario se evalúa en un savepoint: si falla, sus jobs suman un intento
+        (y pasan a 'failed' al agotarlos) sin deshacer ni bloquear los del resto del lote.
+        """
+        batch_size = batch_size or Config.BADGE_WORKER_BATCH_SIZE
+        session = new_session()
+        try:
+            jobs = session.query(BadgeJob.id, BadgeJob.user_id, BadgeJob.events).filter(
+                BadgeJob.status == 'pending'
+            ).order_by(BadgeJob.id).limit(batch_size).with_for_update(skip_locked=True).all()
+            if not jobs:
+                return 0
+
+            # Varios jobs del mismo usuario se evalúan juntos
+            jobs_by_user = {}
+            for job in jobs:
+                jobs_by_user.setdefault(job.user_id, []).append(job)
+
+            done_ids = []
+            for user_id, user_jobs in jobs_by_user.items():
+                events = set()
+                for job in user_jobs:
+                    events.update(job.events.split(","))
+                job_ids = [job.id for job in user_jobs]
+                try:
+                    with session.begin_nested():
+                        self.check_and_award_badges(user_id, session, events, pending=True)
+                    done_ids += job_ids
+                except Exception as e:
+                    print(f"⚠️ Error evaluando insignias del usuario {user_id}: {e}")
+                    attempts = BadgeJob.attempts + 1
+                    session.query(BadgeJob).filter(BadgeJob.id.in_(job_ids)).update({
+                        "attempts": attempts,
+                        "status": case((attempts >= Config.BADGE_JOB_MAX_ATTEMPTS, 'failed'), else_='pending'),
+                        "last_error": str(e)[:500]
+                    }, synchronize_session=False)
+
+            if done_ids:
+                session.query(BadgeJob).filter(
+                    BadgeJob.id.in_(done_ids)
+                ).delete(synchronize_session=False)
+            session.commit()
+            return len(jobs)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def pop_pending_badges(self, user_id):
+        """Insignias otorgadas en segundo plano que el usuario aún no vio (se marcan como vistas)."""
+        session = get_session()
+        try:
+            badge_ids = [
+                badge_id for (badge_id,) in session.execute(
+                    update(UserBadge)
+                    .where(UserBadge.user_id == user_id, UserBadge.pending == True)
+                    .values(pending=False)
+                    .returning(UserBadge.badge_id)
+                ).all()
+            ]
+            if not badge_ids:
+                session.commit()
+                return []
+
+            badges = session.query(Badge).filter(Badge.id.in_(badge_ids)).order_by(Badge.id).all()
+            session.commit()
+            return [{
+                "id": badge.id,
+                "name": badge.name,
+                "description": badge.description,
+                "icon": badge.icon
+            } for badge in badges]
+        finally:
+            session.close()
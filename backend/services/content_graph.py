@@ -0,0 +1,89 @@
+# backend/services/content_graph.py
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+from database.db import new_session
+from models.course import Course
+from models.lesson import Lesson
+from services.content_version_service import get_content_version, COURSES_SCOPE
+
+LessonNode = namedtuple('LessonNode', 'id course_id title order_index xp_reward predecessor')
+
+class ContentGraph:
+    """
+    Snapshot inmutable del orden de cursos y lecciones para un worker.
+    Cada lección conoce a su anterior y cada curso a sus prerrequisitos, así los
+    chequeos de bloqueo no vuelven a ordenar lecciones en cada request.
+    """
+
+    def __init__(self, version, courses, lessons):
+        self.version = version
+        self.course_titles = MappingProxyType({course.id: course.title for course in courses})
+
+        # Cursos en orden: cada uno requiere el anterior (el primero es el inicial)
+        course_ids = sorted(self.course_titles)
+        self.course_prerequisites = MappingProxyType({
+            course_id: (course_ids[i - 1],) if i > 0 else ()
+            for i, course_id in enumerate(course_ids)
+        })
+
+        by_course = {}
+        for lesson in sorted(lessons, key=lambda l: (l.course_id, l.order_index, l.id)):
+            by_course.setdefault(lesson.course_id, []).append(lesson)
+
+        nodes = {}
+        for course_id, course_lessons in by_course.items():
+            predecessor = None
+            for lesson in course_lessons:
+                nodes[lesson.id] = LessonNode(
+                    lesson.id, course_id, lesson.title, lesson.order_index,
+                    lesson.xp_reward, predecessor
+                )
+                predecessor = lesson.id
+        self.lessons = MappingProxyType(nodes)
+        self.course_lessons = MappingProxyType({
+            course_id: tuple(l.id for l in course_lessons)
+            for course_id, course_lessons in by_course.items()
+        })
+
+    def lesson(self, lesson_id):
+        return self.lessons.get(lesson_id)
+
+    def predecessor(self, lesson_id):
+        """Lección anterior del mismo curso (None si es la primera o no existe)."""
+        node = self.lessons.get(lesson_id)
+        return self.lessons[node.predecessor] if node and node.predecessor else None
+
+    def prerequisites(self, course_id):
+        return self.course_prerequisites.get(course_id, ())
+
+    def lesson_count(self, course_id):
+        return len(self.course_lessons.get(course_id, ()))
+
+_graph = None
+_lock = threading.Lock()
+
+def _build_graph(version):
+    session = new_session()
+    try:
+        courses = session.query(Course.id, Course.title).all()
+        lessons = session.query(
+            Lesson.id, Lesson.course_id, Lesson.title, Lesson.order_index, Lesson.xp_reward
+        ).all()
+        return ContentGraph(version, courses, lessons)
+    finally:
+        session.close()
+
+def get_content_graph():
+    """Devuelve el grafo vigente; lo reconstruye si cambió la versión de los cursos en la BD."""
+    global _graph
+    version = get_content_version(COURSES_SCOPE)
+    graph = _graph
+    if graph is not None and graph.version == version:
+        return graph
+
+    with _lock:
+        if _graph is None or _graph.version != version:
+            # Reemplazo atómico: los requests en curso conservan el grafo anterior
+            _graph = _build_graph(version)
+        return _graph
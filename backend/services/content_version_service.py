@@ -0,0 +1,69 @@
+# backend/services/content_version_service.py
+import threading
+import time
+from datetime import datetime
+from database.db import engine
+from models.content_version import ContentVersion
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from config import Config
+
+# Scopes de contenido versionado
+GLOSSARY_SCOPE = 'glossary'
+COURSES_SCOPE = 'courses'            # cursos y lecciones
+TEST_PREFERENCE_SCOPE = 'test_preference'
+BADGES_SCOPE = 'badges'
+LEADERBOARD_SCOPE = 'leaderboard'    # ranking precalculado (scripts/refresh_leaderboard.py)
+AUTH_SCOPE = 'auth'                  # revocaciones de access tokens (token_revocations)
+
+# Caché por proceso: scope -> ((version, updated_at), momento de la última lectura)
+_versions = {}
+_lock = threading.Lock()
+
+def get_content_version(scope: str, max_age=None):
+    """
+    Devuelve la versión actual de un tipo de contenido.
+    Se consulta la BD como máximo una vez cada CONTENT_VERSION_CHECK_SECONDS por worker.
+    """
+    return get_content_stamp(scope, max_age)[0]
+
+def get_content_stamp(scope: str, max_age=None):
+    """(versión, fecha del último cambio) de un tipo de contenido, con la misma caché."""
+    if max_age is None:
+        max_age = Config.CONTENT_VERSION_CHECK_SECONDS
+
+    cached = _versions.get(scope)
+    now = time.monotonic()
+    if cached and now - cached[1] < max_age:
+        return cached[0]
+
+    with _lock:
+        cached = _versions.get(scope)
+        if cached and time.monotonic() - cached[1] < max_age:
+            return cached[0]
+
+        # Conexión propia: no interfiere con la sesión scoped del request
+        with engine.connect() as connection:
+            row = connection.execute(
+                select(ContentVersion.version, ContentVersion.updated_at).where(ContentVersion.scope == scope)
+            ).first()
+
+        stamp = (row.version, row.updated_at) if row else (0, None)
+        _versions[scope] = (stamp, time.monotonic())
+        return stamp
+
+def bump_content_version(session, scope: str):
+    """
+    Incrementa la versión de un contenido (usa la sesión del llamador, NO hace commit).
+    Upsert atómico: el primer bump de un scope crea la fila sin competir por la clave.
+    """
+    table = ContentVersion.__table__
+    now = datetime.utcnow()
+    session.execute(
+        pg_insert(table).values(scope=scope, version=1, updated_at=now)
+        .on_conflict_do_update(
+            index_elements=[table.c.scope],
+            set_={"version": table.c.version + 1, "updated_at": now}
+        )
+    )
+    _versions.pop(scope, None)
@@ -2,6 +2,7 @@
 from database.db import get_session
 from models.course import Course
 from models.lesson import Lesson
+from sqlalchemy.orm import undefer_group
 
 class CourseService:
     def get_courses(self):
@@ -15,7 +16,10 @@ class CourseService:
     def get_course_lessons(self, course_id):
         session = get_session()
         try:
-            lessons = session.query(Lesson).filter_by(course_id=course_id).all()
+            # Se devuelven objetos desconectados de la sesión: cargar también el cuerpo
+            lessons = session.query(Lesson).options(
+                undefer_group('body')
+            ).filter_by(course_id=course_id).all()
             return lessons
         finally:
             session.close()
\ No newline at end of file
@@ -1,8 +1,8 @@
 # backend/services/daily_term_service.py
 from database.db import get_session
-from models.glossary import Glossary
 from models.daily_term_log import DailyTermLog
 from models.activity import Activity, ActivityType 
+from services.glossary_catalog import get_catalog
 from sqlalchemy import func
 from datetime import date
 import sentry_sdk
@@ -11,32 +11,29 @@ def get_daily_term_for_user(user_id):
     """
     Obtiene el término del día para el usuario. No otorga XP automáticamente.
     """
-    session = get_session()
+    catalog = get_catalog()
     today = date.today()
-    try:
-        # 1. Determinar el término del día 
-        total_terms = session.query(Glossary).count()
-        if total_terms == 0:
-            return None
+    
+    # 1. Determinar el término del día (desde el catálogo en memoria)
+    total_terms = len(catalog)
+    if total_terms == 0:
+        return None
 
-        day_of_year = today.timetuple().tm_yday
-        term_id_offset = (day_of_year % total_terms) if total_terms > 0 else 0
-        
-        # Obtener el término basado en el offset
-        daily_term = session.query(Glossary).order_by(Glossary.id).offset(term_id_offset).first()
-        
-        if not daily_term:
-            return None
+    day_of_year = today.timetuple().tm_yday
+    term_id_offset = (day_of_year % total_terms) if total_terms > 0 else 0
+    daily_term = catalog.get(catalog.ids_by_id[term_id_offset])
 
+    session = get_session()
+    try:
         # 2. Verificar si el usuario ya completó este término hoy
         already_viewed = session.query(DailyTermLog).filter(
             DailyTermLog.user_id == user_id,
-            DailyTermLog.glossary_id == daily_term.id,
+            DailyTermLog.glossary_id == daily_term['id'],
             func.date(DailyTermLog.viewed_at) == today
         ).first()
 
         return {
-            "term": daily_term.to_dict(),
+            "term": dict(daily_term),
             "already_viewed_today": already_viewed is not None,
             "xp_reward": 5 # XP que se otorga al completarlo
         }
@@ -44,7 +41,7 @@ def get_daily_term_for_user(user_id):
         sentry_sdk.capture_exception(e)
         return None
     finally:
-        session.remove()
+        session.close()
 
 def complete_daily_term(user_id, term_id, xp_amount=5):
     """
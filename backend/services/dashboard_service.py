@@ -0,0 +1,102 @@
+# backend/services/dashboard_service.py
+from database.db import get_session
+from models.user import User
+from models.course import Course
+from models.lesson import Lesson
+from models.user_badge import UserBadge
+from models.user_progress import UserCourseProgress
+from models.test_preference import TestResult
+from services.streak_service import StreakService
+from sqlalchemy import func, select, exists, and_
+
+def _courses_progress(session, user_id):
+    """Cursos con total de lecciones, lecciones completadas y porcentaje del usuario en una sola consulta agrupada."""
+    lesson_totals = select(
+        Lesson.course_id,
+        func.count(Lesson.id).label('total_lessons')
+    ).group_by(Lesson.course_id).subquery()
+
+    return session.query(
+        Course.id,
+        Course.title,
+        Course.level,
+        func.coalesce(lesson_totals.c.total_lessons, 0),
+        func.coalesce(UserCourseProgress.completed_lessons, 0),
+        func.coalesce(UserCourseProgress.percentage, 0)
+    ).outerjoin(
+        lesson_totals, lesson_totals.c.course_id == Course.id
+    ).outerjoin(
+        UserCourseProgress,
+        and_(UserCourseProgress.course_id == Course.id, UserCourseProgress.user_id == user_id)
+    ).order_by(Course.id).all()
+
+def get_dashboard(user_id: int):
+    """
+    Arma el dashboard del usuario con un número fijo de consultas (no crece con los cursos):
+    1) usuario + cantidad de badges + si tiene resultado del test, 2) cursos con su progreso,
+    3) racha (cacheada por el resto del día). No escribe en users: la visita solo registra
+    el día de actividad (una vez por usuario y día).
+    """
+    streak_service = StreakService()
+    streak_service.mark_active(user_id)
+
+    session = get_session()
+    try:
+        row = session.query(
+            User,
+            select(func.count(UserBadge.id)).where(UserBadge.user_id == user_id).scalar_subquery(),
+            exists().where(TestResult.user_id == user_id)
+        ).filter(User.id == user_id).first()
+        if not row:
+            return None
+        user, badges_count, has_preference_result = row
+
+        course_progress_list = []
+        completed_count = 0
+        next_course_obj = None
+        seen_courses = set()
+
+        for course_id, title, level, total_lessons, completed_lessons, percentage in _courses_progress(session, user_id):
+            if course_id in seen_courses:
+                continue
+            seen_courses.add(course_id)
+
+            if percentage == 100:
+                completed_count += 1
+            elif next_course_obj is None:
+                next_course_obj = {
+                    "title": title,
+                    "level": level
+                }
+
+            course_progress_list.append({
+                "course_id": course_id,
+                "title": title,
+                "completed_lessons": completed_lessons,
+                "total_lessons": total_lessons,
+                "percentage": percentage
+            })
+
+        total_courses = len(course_progress_list)
+        final_exam_passed = (completed_count == total_courses) and (total_courses > 0)
+
+        # Sin la sesión del request: así la racha (ya confirmada) queda en caché
+        current_streak_value = streak_service.get_current_streak(user_id)
+
+        return {
+            "total_xp": user.total_xp,
+            "level": user.get_level(),
+            "xp_next_level": user.get_xp_for_next_level(),
+            "current_streak": current_streak_value,
+            "badges_count": badges_count,
+            "courses_progress": course_progress_list,
+            "next_course": next_course_obj,
+            "completed_courses": completed_count,
+            "total_courses": total_courses,
+            "has_preference_result": bool(has_preference_result),
+            "final_exam_passed": final_exam_passed,
+            "is_academic": user.is_academic_email(),
+            "institution": user.get_institution()
+        }
+    finally:
+        session.close()
@@ -0,0 +1,161 @@
+# backend/services/email_sender.py
+import smtplib
+from datetime import datetime, timedelta
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from database.db import new_session
+from models.email_outbox import EmailOutbox
+from config import Config
+
+# Backoff entre reintentos: 30s, 1m, 2m, 4m... hasta 1 hora
+_BACKOFF_BASE_SECONDS = 30
+_BACKOFF_MAX_SECONDS = 3600
+
+def _backoff(attempts):
+    return timedelta(seconds=min(_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), _BACKOFF_MAX_SECONDS))
+
+class EmailSender:
+    """
+    Envía los correos de email_outbox por lotes con una sola conexión SMTP autenticada,
+    que se reutiliza entre mensajes y lotes y se reabre si el servidor la corta.
+    """
+
+    def __init__(self):
+        self.sender_email = Config.GMAIL_USER
+        self.sender_password = Config.GMAIL_APP_PASSWORD
+        self._server = None
+
+    def _connect(self):
+        server = smtplib.SMTP(Config.SMTP_HOST, Config.SMTP_PORT, timeout=Config.SMTP_TIMEOUT_SECONDS)
+        if Config.SMTP_USE_TLS:
+            server.starttls()
+        if self.sender_email and self.sender_password:
+            server.login(self.sender_email, self.sender_password)
+        return server
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+    def _build_message(self, email):
+        message = MIMEMultipart("alternative")
+        message["Subject"] = email.subject
+        message["From"] = f"CyberLearn <{self.sender_email or 'no-reply@cyberlearn.local'}>"
+        message["To"] = email.to_email
+        # El cliente muestra la última alternativa que entiende: texto primero, HTML al final
+        if email.text_body:
+            message.attach(MIMEText(email.text_body, "plain"))
+        message.attach(MIMEText(email.html_body, "html"))
+        return message
+
+    def _send(self, message):
+        if self._server is None:
+            self._server = self._connect()
+        try:
+            self._server.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            # La conexión reutilizada expiró: reconectar una vez
+            self._server = self._connect()
+            self._server.send_message(message)
+
+    def _claim(self, batch_size):
+        """
+        Reserva un lote: las filas pasan a 'sending' con un plazo (next_attempt_at) y se
+        hace commit enseguida, así ningún bloqueo ni transacción sigue abierto durante el SMTP.
+        Si el worker muere, las filas vuelven a estar disponibles al vencer el plazo.
+        """
+        session = new_session()
+        try:
+            now = datetime.utcnow()
+            emails = session.query(EmailOutbox).filter(
+                EmailOutbox.status.in_(('pending', 'sending')),
+                EmailOutbox.next_attempt_at <= now
+            ).order_by(EmailOutbox.next_attempt_at).limit(batch_size).with_for_update(skip_locked=True).all()
+
+            claimed = []
+            lease_until = now + timedelta(seconds=Config.EMAIL_SEND_LEASE_SECONDS)
+            for email in emails:
+                email.status = 'sending'
+                email.attempts += 1
+                email.next_attempt_at = lease_until
+                claimed.append((email.id, email.attempts, email.kind, email.to_email, self._build_message(email)))
+            session.commit()
+            return claimed
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _record(self, email_id, values):
+        """Guarda el resultado de un envío (solo si la fila sigue reservada por este intento)."""
+        session = new_session()
+        try:
+            session.query(EmailOutbox).filter(
+                EmailOutbox.id == email_id,
+                EmailOutbox.status == 'sending'
+            ).update(values, synchronize_session=False)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def send_batch(self, batch_size=None):
+        """
+        Envía un lote de correos pendientes. Varios workers pueden correr a la vez:
+        SKIP LOCKED reparte las filas al reservarlas. Devuelve cuántos correos se procesaron.
+        """
+        claimed = self._claim(batch_size or Config.EMAIL_BATCH_SIZE)
+        for email_id, attempts, kind, to_email, message in claimed:
+            try:
+                self._send(message)
+                self._record(email_id, {"status": 'sent', "sent_at": datetime.utcnow(), "last_error": None})
+                print(f"✅ Email '{kind}' enviado a {to_email}")
+            except Exception as e:
+                # Conexión en estado desconocido: la siguiente se abre de nuevo
+                self.close()
+                error = str(e)[:500]
+                if attempts >= Config.EMAIL_MAX_ATTEMPTS:
+                    self._record(email_id, {"status": 'failed', "last_error": error})
+                    print(f"❌ Email a {to_email} descartado tras {attempts} intentos: {e}")
+                else:
+                    self._record(email_id, {
+                        "status": 'pending',
+                        "last_error": error,
+                        "next_attempt_at": datetime.utcnow() + _backoff(attempts)
+                    })
+                    print(f"⚠️ Error enviando email a {to_email} (intento {attempts}): {e}")
+        return len(claimed)
+
+def purge_email_outbox(batch_size=5000):
+    """
+    Borra en lotes los correos enviados o descartados hace más de EMAIL_RETENTION_DAYS.
+    Devuelve cuántas filas se borraron.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=Config.EMAIL_RETENTION_DAYS)
+    total = 0
+    session = new_session()
+    try:
+        while True:
+            ids = session.query(EmailOutbox.id).filter(
+                EmailOutbox.status.in_(('sent', 'failed')),
+                EmailOutbox.created_at < cutoff
+            ).limit(batch_size).scalar_subquery()
+            deleted = session.query(EmailOutbox).filter(
+                EmailOutbox.id.in_(ids)
+            ).delete(synchronize_session=False)
+            session.commit()
+            total += deleted
+            if deleted < batch_size:
+                return total
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
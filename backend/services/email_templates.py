@@ -0,0 +1,72 @@
+# backend/services/email_templates.py
+import os
+import re
+import threading
+from html import unescape
+from markupsafe import escape
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+_TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates', 'email')
+
+# Variables que cambian por destinatario; todo lo demás se renderiza una sola vez
+EMAIL_VARIABLES = ('user_name', 'code')
+
+_env = Environment(
+    loader=FileSystemLoader(_TEMPLATES_DIR),
+    autoescape=select_autoescape(['html'])
+)
+
+_MARKER = '\x00{}\x00'
+_MARKER_RE = re.compile('\x00(\\w+)\x00')
+
+def _html_to_text(html):
+    """Alternativa en texto plano: sin <head>/<style>, bloques en líneas separadas."""
+    text = re.sub(r'(?is)<(head|style|script)\b.*?</\1>', '', html)
+    text = re.sub(r'(?i)<br\s*/?>', '\n', text)
+    text = re.sub(r'(?i)</(p|div|h[1-6]|li|tr)>', '\n', text)
+    text = re.sub(r'<[^>]+>', '', text)
+    lines = [' '.join(line.split()) for line in unescape(text).splitlines()]
+    return '\n\n'.join(line for line in lines if line) + '\n'
+
+class PrecompiledEmail:
+    """
+    Plantilla de correo ya renderizada con marcadores en lugar de las variables.
+    Renderizar es solo unir los trozos estáticos con los valores escapados
+    (sin volver a ejecutar Jinja ni regenerar el CSS/HTML fijo).
+    """
+
+    def __init__(self, template_name):
+        template = _env.get_template(template_name)
+        html = template.render({name: _MARKER.format(name) for name in EMAIL_VARIABLES})
+        self.html_parts = _MARKER_RE.split(html)
+        self.text_parts = _MARKER_RE.split(_html_to_text(html))
+
+    @staticmethod
+    def _join(parts, values, escape_value):
+        # split() alterna trozo estático / nombre de variable / trozo estático...
+        out = []
+        for i, part in enumerate(parts):
+            if i % 2:
+                out.append(escape_value(str(values.get(part, ''))))
+            else:
+                out.append(part)
+        return ''.join(out)
+
+    def render(self, **values):
+        """(html, texto) para un destinatario."""
+        html = self._join(self.html_parts, values, lambda v: str(escape(v)))
+        text = self._join(self.text_parts, values, lambda v: v)
+        return html, text
+
+_compiled = {}
+_lock = threading.Lock()
+
+def render_email(name, **values):
+    """Renderiza templates/email/<name>.html (se compila una vez por proceso)."""
+    email = _compiled.get(name)
+    if email is None:
+        with _lock:
+            email = _compiled.get(name)
+            if email is None:
+                email = _compiled[name] = PrecompiledEmail(f'{name}.html')
+    return email.render(**values)
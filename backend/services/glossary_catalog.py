@@ -0,0 +1,90 @@
+# backend/services/glossary_catalog.py
+import threading
+from bisect import bisect_right
+from functools import cached_property
+from types import MappingProxyType
+from database.db import new_session
+from models.glossary import Glossary
+from services.content_version_service import get_content_version, GLOSSARY_SCOPE
+from services.glossary_search import normalize, GlossarySearchIndex, TrigramIndex, SuggestIndex
+
+def sort_key(term_es, glossary_id):
+    """Orden alfabético sin distinguir tildes ni mayúsculas; el id desempata."""
+    return (normalize(term_es), term_es or '', glossary_id)
+
+class GlossaryCatalog:
+    """
+    Snapshot inmutable del glosario para un worker.
+    Se construye una vez por versión de contenido y nunca se modifica.
+    """
+
+    def __init__(self, version, terms):
+        self.version = version
+
+        # Términos pre-serializados, ordenados por term_es (orden del listado y del cursor)
+        terms = sorted(terms, key=lambda t: sort_key(t.term_es, t.id))
+        self.terms = tuple(MappingProxyType(t.to_dict()) for t in terms)
+        self.sort_keys = tuple(sort_key(t.term_es, t.id) for t in terms)
+        self.position_by_id = {t['id']: i for i, t in enumerate(self.terms)}
+
+        # Orden por id (término del día)
+        self.ids_by_id = tuple(sorted(self.position_by_id))
+
+        counts = {}
+        for term in self.terms:
+            name = term['category'] or "Sin categoría"
+            counts[name] = counts.get(name, 0) + 1
+        self.category_counts = tuple(
+            MappingProxyType({"name": name, "count": count}) for name, count in counts.items()
+        )
+
+    @cached_property
+    def search_index(self):
+        """Índice full-text en memoria (se construye al primer uso)."""
+        return GlossarySearchIndex(self.terms)
+
+    @cached_property
+    def trigram_index(self):
+        """Índice de trigramas para búsqueda difusa (se construye al primer uso)."""
+        return TrigramIndex(self.terms)
+
+    @cached_property
+    def suggest_index(self):
+        """Índice de prefijos para autocompletado (se construye al primer uso)."""
+        return SuggestIndex(self.terms)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def position_after(self, term_es, glossary_id):
+        """Primera posición estrictamente después del cursor (term_es, id) (paginación keyset)."""
+        return bisect_right(self.sort_keys, sort_key(term_es, glossary_id))
+
+    def get(self, glossary_id):
+        position = self.position_by_id.get(glossary_id)
+        return self.terms[position] if position is not None else None
+
+_catalog = None
+_lock = threading.Lock()
+
+def _build_catalog(version):
+    session = new_session()
+    try:
+        terms = session.query(Glossary).all()
+        return GlossaryCatalog(version, terms)
+    finally:
+        session.close()
+
+def get_catalog():
+    """Devuelve el snapshot vigente; lo reconstruye si cambió la versión del glosario en la BD."""
+    global _catalog
+    version = get_content_version(GLOSSARY_SCOPE)
+    catalog = _catalog
+    if catalog is not None and catalog.version == version:
+        return catalog
+
+    with _lock:
+        if _catalog is None or _catalog.version != version:
+            # Reemplazo atómico: los requests en curso conservan el snapshot anterior
+            _catalog = _build_catalog(version)
+        return _catalog
@@ -0,0 +1,278 @@
+# backend/services/glossary_search.py
+import re
+import unicodedata
+from bisect import bisect_left
+from sqlalchemy import func, or_, desc, text, literal
+from models.glossary import Glossary
+from config import Config
+
+# Pesos por campo (mismos valores por defecto que ts_rank para A/B/C/D)
+FIELD_WEIGHTS = (
+    ('term_es', 1.0), ('term_en', 1.0),
+    ('acronym', 0.4),
+    ('definition_es', 0.2), ('definition_en', 0.2),
+    ('example_es', 0.1), ('example_en', 0.1),
+)
+
+_TOKEN_RE = re.compile(r'\w+')
+
+def normalize(text):
+    """Minúsculas y sin tildes ('Criptografía' -> 'criptografia')."""
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+def tokenize(text):
+    return _TOKEN_RE.findall(normalize(text))
+
+class GlossarySearchIndex:
+    """
+    Índice invertido en memoria sobre el catálogo del glosario.
+    Equivalente a la búsqueda full-text de Postgres: todas las palabras deben
+    coincidir (por prefijo) y el ranking pondera término > acrónimo > definición > ejemplo.
+    """
+
+    def __init__(self, terms):
+        # token -> {posición en el catálogo: peso del mejor campo donde aparece}
+        postings = {}
+        for position, term in enumerate(terms):
+            for field, weight in FIELD_WEIGHTS:
+                for token in set(tokenize(term.get(field))):
+                    docs = postings.setdefault(token, {})
+                    docs[position] = max(docs.get(position, 0), weight)
+        self.postings = postings
+        self.tokens = sorted(postings)
+
+    def _prefix_scores(self, prefix):
+        """Suma de pesos por documento para todos los tokens que empiezan con el prefijo."""
+        scores = {}
+        i = bisect_left(self.tokens, prefix)
+        while i < len(self.tokens) and self.tokens[i].startswith(prefix):
+            for position, weight in self.postings[self.tokens[i]].items():
+                # Un documento cuenta una vez aunque varios tokens coincidan con el prefijo
+                scores[position] = max(scores.get(position, 0), weight)
+            i += 1
+        return scores
+
+    def search(self, query, limit=None):
+        """Devuelve posiciones del catálogo ordenadas por relevancia."""
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+
+        totals = None
+        for token in query_tokens:
+            scores = self._prefix_scores(token)
+            if totals is None:
+                totals = scores
+            else:
+                totals = {p: totals[p] + s for p, s in scores.items() if p in totals}
+            if not totals:
+                return []
+
+        # Desempate por orden alfabético del catálogo (term_es)
+        ranked = sorted(totals, key=lambda p: (-totals[p], p))
+        return ranked[:limit] if limit else ranked
+
+def _to_tsquery_text(query):
+    """Convierte texto libre en 'palabra:* & palabra:*' (sin operadores del usuario)."""
+    words = _TOKEN_RE.findall(query.lower())
+    return ' & '.join(f"{w}:*" for w in words)
+
+def search_ids_postgres(session, query, limit=None):
+    """
+    Búsqueda full-text en Postgres (GIN sobre search_es/search_en) con ranking ponderado.
+    A diferencia del índice en memoria, NO ignora tildes: las columnas generadas no pueden
+    usar unaccent() (no es IMMUTABLE) y el servidor no siempre tiene la extensión.
+    'criptografia' puede no encontrar 'Criptografía' aquí; en ese caso search_glossary
+    cae a la búsqueda difusa (trigramas), donde una tilde es solo una letra distinta.
+    """
+    tsquery_text = _to_tsquery_text(query)
+    if not tsquery_text:
+        return []
+
+    query_es = func.to_tsquery('spanish', tsquery_text)
+    query_en = func.to_tsquery('english', tsquery_text)
+    rank = func.greatest(
+        func.ts_rank(Glossary.search_es, query_es),
+        func.ts_rank(Glossary.search_en, query_en)
+    )
+
+    q = session.query(Glossary.id).filter(
+        or_(
+            Glossary.search_es.op('@@')(query_es),
+            Glossary.search_en.op('@@')(query_en)
+        )
+    ).order_by(desc(rank), Glossary.term_es)
+    if limit:
+        q = q.limit(limit)
+    return [glossary_id for (glossary_id,) in q.all()]
+
+def search_positions(session, catalog, query, limit=None):
+    """
+    Posiciones del catálogo que coinciden con la búsqueda, por relevancia.
+    Usa Postgres si está disponible; si no (tests, SQLite), el índice en memoria.
+    Las tildes solo se ignoran en el índice en memoria (ver search_ids_postgres).
+    """
+    if session.get_bind().dialect.name == 'postgresql':
+        ids = search_ids_postgres(session, query, limit)
+        return [catalog.position_by_id[i] for i in ids if i in catalog.position_by_id]
+    return catalog.search_index.search(query, limit)
+
+# ==========================================
+# BÚSQUEDA DIFUSA (TRIGRAMAS)
+# ==========================================
+
+FUZZY_FIELDS = ('term_es', 'term_en', 'acronym')
+
+def trigrams(text):
+    """Trigramas al estilo pg_trgm: cada palabra con dos espacios al inicio y uno al final."""
+    result = set()
+    for word in tokenize(text):
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            result.add(padded[i:i + 3])
+    return result
+
+class TrigramIndex:
+    """
+    Índice invertido de trigramas sobre term_es, term_en y acrónimo.
+    Cada campo se indexa completo y palabra por palabra, así 'fishing'
+    encuentra 'Phishing Dirigido' (similitud por palabra, como word_similarity).
+    """
+
+    def __init__(self, terms):
+        self.unit_position = []   # unidad -> posición en el catálogo
+        self.unit_size = []       # unidad -> cantidad de trigramas
+        self.postings = {}        # trigrama -> [unidades]
+        self.term_length = [len(term['term_es'] or '') for term in terms]
+
+        for position, term in enumerate(terms):
+            for field in FUZZY_FIELDS:
+                value = term.get(field)
+                if not value:
+                    continue
+                words = tokenize(value)
+                units = {value} | (set(words) if len(words) > 1 else set())
+                for unit in units:
+                    grams = trigrams(unit)
+                    if not grams:
+                        continue
+                    unit_id = len(self.unit_position)
+                    self.unit_position.append(position)
+                    self.unit_size.append(len(grams))
+                    for gram in grams:
+                        self.postings.setdefault(gram, []).append(unit_id)
+
+    def search(self, query, threshold, limit=None):
+        """Posiciones con similitud >= threshold, ordenadas de mayor a menor similitud."""
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+
+        shared = {}
+        for gram in query_grams:
+            for unit_id in self.postings.get(gram, ()):
+                shared[unit_id] = shared.get(unit_id, 0) + 1
+
+        best = {}
+        query_size = len(query_grams)
+        for unit_id, common in shared.items():
+            similarity = common / (query_size + self.unit_size[unit_id] - common)
+            if similarity >= threshold:
+                position = self.unit_position[unit_id]
+                if similarity > best.get(position, 0):
+                    best[position] = similarity
+
+        # A igual similitud, primero el término más corto ("Ransomware" antes que "Negociación con Ransomware")
+        ranked = sorted(best, key=lambda p: (-best[p], self.term_length[p], p))
+        return ranked[:limit] if limit else ranked
+
+def fuzzy_ids_postgres(session, query, threshold, limit=None):
+    """Búsqueda difusa con pg_trgm (operador <% con índices GIN gin_trgm_ops)."""
+    query = query.strip().lower()
+    if not query:
+        return []
+
+    # Umbral solo para esta transacción
+    session.execute(
+        text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+        {"threshold": str(threshold)}
+    )
+
+    columns = [func.lower(getattr(Glossary, field)) for field in FUZZY_FIELDS]
+    similarity = func.greatest(*[
+        func.coalesce(func.word_similarity(query, column), 0) for column in columns
+    ])
+
+    q = session.query(Glossary.id).filter(
+        or_(*[literal(query).op('<%')(column) for column in columns])
+    ).order_by(desc(similarity), func.length(Glossary.term_es), Glossary.term_es)
+    if limit:
+        q = q.limit(limit)
+    return [glossary_id for (glossary_id,) in q.all()]
+
+def fuzzy_positions(session, catalog, query, threshold=None, limit=None):
+    """Posiciones del catálogo parecidas a la búsqueda (tolerante a errores de tipeo)."""
+    if threshold is None:
+        threshold = Config.GLOSSARY_FUZZY_THRESHOLD
+    if session.get_bind().dialect.name == 'postgresql':
+        ids = fuzzy_ids_postgres(session, query, threshold, limit)
+        return [catalog.position_by_id[i] for i in ids if i in catalog.position_by_id]
+    return catalog.trigram_index.search(query, threshold, limit)
+
+# ==========================================
+# AUTOCOMPLETADO (PREFIJOS)
+# ==========================================
+
+SUGGEST_FIELDS = ('term_es', 'term_en', 'acronym')
+
+class SuggestIndex:
+    """
+    Arreglo ordenado de claves normalizadas (sin tildes) para autocompletado con bisect.
+    Primero se indexa el valor completo de cada campo y luego cada palabra interna,
+    así 'sql' sugiere 'SQL ...' antes que 'Inyección SQL'.
+    """
+
+    def __init__(self, terms):
+        full_keys = []
+        word_keys = []
+        for position, term in enumerate(terms):
+            for field in SUGGEST_FIELDS:
+                key = normalize(term.get(field))
+                if not key:
+                    continue
+                full_keys.append((key, position, field))
+                for match in _TOKEN_RE.finditer(key):
+                    if match.start() > 0:
+                        word_keys.append((key[match.start():], position, field))
+        full_keys.sort()
+        word_keys.sort()
+        self.full_keys = full_keys
+        self.word_keys = word_keys
+
+    @staticmethod
+    def _scan(keys, prefix):
+        i = bisect_left(keys, (prefix,))
+        while i < len(keys) and keys[i][0].startswith(prefix):
+            yield keys[i]
+            i += 1
+
+    def suggest(self, prefix, limit=10):
+        """Hasta `limit` (posición, campo) cuyo término, traducción o acrónimo empieza con el prefijo."""
+        prefix = normalize(prefix).strip()
+        if not prefix:
+            return []
+
+        result = []
+        seen = set()
+        for keys in (self.full_keys, self.word_keys):
+            for _, position, field in self._scan(keys, prefix):
+                if position in seen:
+                    continue
+                seen.add(position)
+                result.append((position, field))
+                if len(result) >= limit:
+                    return result
+        return result
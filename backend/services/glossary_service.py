@@ -1,78 +1,195 @@
 # backend/services/glossary_service.py
 from database.db import get_session
-from models.glossary import Glossary
 from models.user_glossary_progress import UserGlossaryProgress
-from sqlalchemy import func, or_
+from models.user_glossary_favorite import UserGlossaryFavorite
+from services.glossary_catalog import get_catalog
+from services.content_version_service import get_content_version, GLOSSARY_SCOPE
+from services.glossary_search import search_positions, fuzzy_positions
+from sqlalchemy import func, select, union_all, literal, null, cast, Boolean, Integer, DateTime
 from datetime import datetime
 
-def get_all_glossary_terms(user_id=None):
-    """Obtiene todos los términos, con progreso del usuario si está autenticado."""
+def _user_overlay(session, user_id):
+    """
+    Estado del usuario sobre el catálogo (aprendido, práctica, favorito)
+    en una sola consulta pequeña: glossary_id -> dict.
+    """
+    progress = select(
+        UserGlossaryProgress.glossary_id,
+        UserGlossaryProgress.is_learned,
+        UserGlossaryProgress.times_practiced,
+        UserGlossaryProgress.learned_at,
+        literal(False).label('is_favorite')
+    ).where(UserGlossaryProgress.user_id == user_id)
+
+    favorites = select(
+        UserGlossaryFavorite.glossary_id,
+        cast(null(), Boolean),
+        cast(null(), Integer),
+        cast(null(), DateTime),
+        literal(True)
+    ).where(UserGlossaryFavorite.user_id == user_id)
+
+    overlay = {}
+    for glossary_id, is_learned, times_practiced, learned_at, favorite in session.execute(union_all(progress, favorites)):
+        state = overlay.setdefault(glossary_id, {
+            'is_learned': False, 'times_practiced': 0, 'learned_at': None, 'is_favorite': False
+        })
+        if favorite:
+            state['is_favorite'] = True
+        elif 'has_progress' not in state:
+            # Solo la primera fila de progreso cuenta (como el antiguo .first())
+            state['has_progress'] = True
+            state['is_learned'] = bool(is_learned)
+            state['times_practiced'] = times_practiced or 0
+            state['learned_at'] = learned_at
+    return overlay
+
+_EMPTY_STATE = {'is_learned': False, 'times_practiced': 0, 'learned_at': None, 'is_favorite': False}
+
+def _merge(term, state, include_learned_at=False):
+    """Copia el término del catálogo y le agrega el estado del usuario."""
+    state = state or _EMPTY_STATE
+    term_dict = dict(term)
+    term_dict['is_learned'] = state['is_learned']
+    term_dict['times_practiced'] = state['times_practiced']
+    term_dict['is_favorite'] = state['is_favorite']
+    if include_learned_at:
+        term_dict['learned_at'] = state['learned_at'].isoformat() if state['learned_at'] else None
+    return term_dict
+
+def _load_overlay(user_id):
+    if not user_id:
+        return {}
     session = get_session()
     try:
-        terms = session.query(Glossary).order_by(Glossary.term_es).all()
-        
-        result = []
-        for term in terms:
-            term_dict = term.to_dict()
-            
-            # Si hay usuario, agregar progreso
-            if user_id:
-                progress = session.query(UserGlossaryProgress).filter_by(
-                    user_id=user_id,
-                    glossary_id=term.id
-                ).first()
-                
-                term_dict['is_learned'] = progress.is_learned if progress else False
-                term_dict['times_practiced'] = progress.times_practiced if progress else 0
-            else:
-                term_dict['is_learned'] = False
-                term_dict['times_practiced'] = 0
-            
-            result.append(term_dict)
-        
-        return result
+        return _user_overlay(session, user_id)
     finally:
         session.close()
 
+# Campos que dependen del idioma (lang=es|en)
+_LANGUAGE_FIELDS = {
+    'es': ('term_en', 'definition_en', 'example_en'),
+    'en': ('term_es', 'definition_es', 'example_es'),
+}
+_USER_FIELDS = ('is_learned', 'times_practiced', 'is_favorite')
+_SKIP_OVERLAY = object()
+
+def _project(term, state, lang=None, fields=None):
+    """Arma el término con solo el idioma y los campos pedidos."""
+    term_dict = _merge(term, state) if state is not _SKIP_OVERLAY else dict(term)
+
+    if lang in _LANGUAGE_FIELDS:
+        if lang == 'en':
+            term_dict['term'] = term['term_en']
+            term_dict['definition'] = term['definition_en']
+            term_dict['example'] = term['example_en']
+        for field in _LANGUAGE_FIELDS[lang]:
+            term_dict.pop(field, None)
+
+    if fields:
+        term_dict = {k: v for k, v in term_dict.items() if k in fields}
+    return term_dict
+
+def get_glossary_page(user_id=None, after=None, limit=None, lang=None, fields=None):
+    """
+    Listado paginado por cursor (keyset sobre term_es, id).
+    `after` es el cursor 'term_es,id' devuelto como next_cursor en la página anterior.
+    `fields` limita los campos devueltos (el id siempre se incluye).
+    """
+    catalog = get_catalog()
+
+    start = 0
+    if after:
+        term_es, _, raw_id = after.rpartition(',')
+        try:
+            start = catalog.position_after(term_es, int(raw_id))
+        except ValueError:
+            raise ValueError("Cursor inválido")
+
+    end = len(catalog) if limit is None else min(start + max(limit, 1), len(catalog))
+    page = catalog.terms[start:end]
+
+    if fields:
+        fields = {f.strip() for f in fields.split(',') if f.strip()} | {'id'}
+
+    # El progreso del usuario solo se consulta si se va a devolver
+    needs_overlay = not fields or any(f in fields for f in _USER_FIELDS)
+    overlay = _load_overlay(user_id) if needs_overlay else None
+
+    terms = [
+        _project(term, overlay.get(term['id']) if overlay is not None else _SKIP_OVERLAY, lang, fields)
+        for term in page
+    ]
+
+    next_cursor = None
+    if end < len(catalog):
+        last = catalog.terms[end - 1]
+        next_cursor = f"{last['term_es']},{last['id']}"
+
+    return {"terms": terms, "next_cursor": next_cursor}
+
+def get_glossary_etag(user_id, fields=None, variant=''):
+    """
+    ETag del listado: versión del catálogo + (si se devuelven campos del usuario)
+    un sello barato de su progreso y favoritos, sin serializar el glosario.
+    """
+    etag = f"glossary-{get_content_version(GLOSSARY_SCOPE)}"
+    requested = {f.strip() for f in fields.split(',')} if fields else None
+    if requested is None or any(f in requested for f in _USER_FIELDS):
+        session = get_session()
+        try:
+            stamp = session.execute(select(
+                select(func.count()).where(UserGlossaryProgress.user_id == user_id).scalar_subquery(),
+                select(func.max(UserGlossaryProgress.updated_at)).where(UserGlossaryProgress.user_id == user_id).scalar_subquery(),
+                select(func.count()).where(UserGlossaryFavorite.user_id == user_id).scalar_subquery(),
+                select(func.max(UserGlossaryFavorite.added_at)).where(UserGlossaryFavorite.user_id == user_id).scalar_subquery()
+            )).first()
+        finally:
+            session.close()
+        progress_count, progress_at, favorite_count, favorite_at = stamp
+        moments = [m.timestamp() for m in (progress_at, favorite_at) if m]
+        etag += f"-u{user_id}.{progress_count}.{favorite_count}.{int(max(moments, default=0) * 1000)}"
+    return f"{etag}-{variant}" if variant else etag
+
+def get_all_glossary_terms(user_id=None):
+    """Obtiene todos los términos, con progreso del usuario si está autenticado."""
+    catalog = get_catalog()
+    overlay = _load_overlay(user_id)
+    return [_merge(term, overlay.get(term['id'])) for term in catalog.terms]
+
 def search_glossary(query: str, user_id=None):
-    """Busca términos en el glosario (bilingüe)."""
+    """Busca términos en el glosario (bilingüe, full-text, ordenados por relevancia)."""
+    catalog = get_catalog()
     session = get_session()
     try:
-        query = query.strip().lower()
-        
-        # Buscar en español e inglés
-        terms = session.query(Glossary).filter(
-            or_(
-                func.lower(Glossary.term_en).contains(query),
-                func.lower(Glossary.term_es).contains(query),
-                func.lower(Glossary.definition_en).contains(query),
-                func.lower(Glossary.definition_es).contains(query),
-                func.lower(Glossary.acronym).contains(query) if Glossary.acronym else False
-            )
-        ).order_by(Glossary.term_es).all()
-        
-        result = []
-        for term in terms:
-            term_dict = term.to_dict()
-            
-            if user_id:
-                progress = session.query(UserGlossaryProgress).filter_by(
-                    user_id=user_id,
-                    glossary_id=term.id
-                ).first()
-                
-                term_dict['is_learned'] = progress.is_learned if progress else False
-                term_dict['times_practiced'] = progress.times_practiced if progress else 0
-            else:
-                term_dict['is_learned'] = False
-                term_dict['times_practiced'] = 0
-            
-            result.append(term_dict)
-        
-        return result
+        if query.strip():
+            positions = search_positions(session, catalog, query)
+            if not positions:
+                # Sin coincidencias exactas: tolerar errores de tipeo ("ransonware")
+                positions = fuzzy_positions(session, catalog, query)
+        else:
+            positions = range(len(catalog))
+        overlay = _user_overlay(session, user_id) if user_id else {}
     finally:
         session.close()
 
+    return [_merge(catalog.terms[p], overlay.get(catalog.terms[p]['id'])) for p in positions]
+
+def suggest_glossary_terms(prefix: str, limit: int = 10):
+    """Autocompletado por prefijo (término, traducción o acrónimo). No consulta la BD."""
+    catalog = get_catalog()
+    suggestions = []
+    for position, field in catalog.suggest_index.suggest(prefix, limit):
+        term = catalog.terms[position]
+        suggestions.append({
+            "id": term['id'],
+            "term_es": term['term_es'],
+            "term_en": term['term_en'],
+            "acronym": term['acronym'],
+            "matched_field": field
+        })
+    return suggestions
+
 def mark_term_as_learned(user_id: int, glossary_id: int, is_learned: bool):
     """Marca un término como aprendido/no aprendido."""
     session = get_session()
@@ -102,70 +219,43 @@ def mark_term_as_learned(user_id: int, glossary_id: int, is_learned: bool):
 
 def get_learned_terms(user_id: int):
     """Obtiene solo los términos marcados como aprendidos."""
-    session = get_session()
-    try:
-        learned_progress = session.query(UserGlossaryProgress).filter_by(
-            user_id=user_id,
-            is_learned=True
-        ).all()
-        
-        glossary_ids = [p.glossary_id for p in learned_progress]
-        
-        if not glossary_ids:
-            return []
-        
-        terms = session.query(Glossary).filter(
-            Glossary.id.in_(glossary_ids)
-        ).all()
-        
-        result = []
-        for term in terms:
-            term_dict = term.to_dict()
-            
-            progress = next((p for p in learned_progress if p.glossary_id == term.id), None)
-            if progress:
-                term_dict['is_learned'] = True
-                term_dict['times_practiced'] = progress.times_practiced
-                term_dict['learned_at'] = progress.learned_at.isoformat() if progress.learned_at else None
-            
-            result.append(term_dict)
-        
-        return result
-    finally:
-        session.close()
+    catalog = get_catalog()
+    overlay = _load_overlay(user_id)
+    
+    positions = sorted(
+        catalog.position_by_id[glossary_id] for glossary_id, state in overlay.items()
+        if state['is_learned'] and glossary_id in catalog.position_by_id
+    )
+    return [
+        _merge(catalog.terms[p], overlay[catalog.terms[p]['id']], include_learned_at=True)
+        for p in positions
+    ]
 
 def get_glossary_stats(user_id=None):
     """Obtiene estadísticas del glosario."""
-    session = get_session()
-    try:
-        total = session.query(Glossary).count()
-        
-        categories = session.query(
-            Glossary.category, 
-            func.count(Glossary.id)
-        ).group_by(Glossary.category).all()
-        
-        stats = {
-            "total_terms": total,
-            "categories": [
-                {"name": c[0] or "Sin categoría", "count": c[1]} 
-                for c in categories
-            ]
-        }
-        
-        # Si hay usuario, agregar progreso
-        if user_id:
+    catalog = get_catalog()
+    total = len(catalog)
+    
+    stats = {
+        "total_terms": total,
+        "categories": [dict(c) for c in catalog.category_counts]
+    }
+    
+    # Si hay usuario, agregar progreso
+    if user_id:
+        session = get_session()
+        try:
             learned_count = session.query(UserGlossaryProgress).filter_by(
                 user_id=user_id,
                 is_learned=True
             ).count()
-            
-            stats["learned_count"] = learned_count
-            stats["progress_percentage"] = round((learned_count / total * 100), 1) if total > 0 else 0
+        finally:
+            session.close()
         
-        return stats
-    finally:
-        session.close()
+        stats["learned_count"] = learned_count
+        stats["progress_percentage"] = round((learned_count / total * 100), 1) if total > 0 else 0
+    
+    return stats
 
 def record_quiz_attempt(user_id: int, glossary_id: int, is_correct: bool):
     """Registra un intento de práctica (quiz)."""
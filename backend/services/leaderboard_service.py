@@ -0,0 +1,138 @@
+# backend/services/leaderboard_service.py
+import threading
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import datetime
+from database.db import new_session
+from models.user import User
+from models.leaderboard_entry import LeaderboardEntry
+from services.content_version_service import get_content_version, bump_content_version, LEADERBOARD_SCOPE
+from sqlalchemy import insert
+
+RankedEntry = namedtuple('RankedEntry', 'user_id name institution total_xp')
+
+class Ranking:
+    """Lista ordenada por XP (desc) con las claves negadas para buscar posiciones con bisect."""
+
+    def __init__(self, entries):
+        self.entries = tuple(entries)
+        self.neg_xp = tuple(-e.total_xp for e in self.entries)
+        self.position_by_user = {e.user_id: i for i, e in enumerate(self.entries)}
+
+    def rank_for_xp(self, total_xp):
+        """Puesto que corresponde a ese XP (empates comparten puesto): O(log n)."""
+        return bisect_left(self.neg_xp, -total_xp) + 1
+
+    def page(self, offset, limit):
+        return [
+            {"rank": self.rank_for_xp(e.total_xp), "user_id": e.user_id, "name": e.name, "total_xp": e.total_xp}
+            for e in self.entries[offset:offset + limit]
+        ]
+
+class LeaderboardSnapshot:
+    """Snapshot inmutable del ranking global y por institución para un worker."""
+
+    def __init__(self, version, entries):
+        self.version = version
+        entries = sorted(entries, key=lambda e: (-e.total_xp, e.user_id))
+        self.global_ranking = Ranking(entries)
+
+        by_institution = {}
+        for entry in entries:
+            if entry.institution:
+                by_institution.setdefault(entry.institution, []).append(entry)
+        self.institution_rankings = {name: Ranking(e) for name, e in by_institution.items()}
+
+    def ranking(self, institution=None):
+        if institution is None:
+            return self.global_ranking
+        return self.institution_rankings.get(institution)
+
+_snapshot = None
+_lock = threading.Lock()
+
+def _load_snapshot(version):
+    session = new_session()
+    try:
+        rows = session.query(
+            LeaderboardEntry.user_id, LeaderboardEntry.name,
+            LeaderboardEntry.institution, LeaderboardEntry.total_xp
+        ).all()
+        return LeaderboardSnapshot(version, [RankedEntry(*row) for row in rows])
+    finally:
+        session.close()
+
+def get_leaderboard():
+    """Devuelve el ranking vigente; lo recarga cuando el script de refresco publica una versión nueva."""
+    global _snapshot
+    version = get_content_version(LEADERBOARD_SCOPE)
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    with _lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = _load_snapshot(version)
+        return _snapshot
+
+def get_leaderboard_page(institution=None, offset=0, limit=20):
+    """Top-N del ranking global o de una institución (desde el snapshot en memoria)."""
+    ranking = get_leaderboard().ranking(institution)
+    if ranking is None:
+        return {"institution": institution, "total": 0, "entries": []}
+    return {
+        "institution": institution,
+        "total": len(ranking.entries),
+        "entries": ranking.page(offset, limit)
+    }
+
+def get_user_rank(user_id: int, institution=None):
+    """Puesto del usuario en el ranking (None si aún no aparece en el último refresco)."""
+    ranking = get_leaderboard().ranking(institution)
+    if ranking is None:
+        return None
+    position = ranking.position_by_user.get(user_id)
+    if position is None:
+        return None
+    entry = ranking.entries[position]
+    return {
+        "rank": ranking.rank_for_xp(entry.total_xp),
+        "total": len(ranking.entries),
+        "total_xp": entry.total_xp,
+        "institution": entry.institution
+    }
+
+def refresh_leaderboard(chunk_size=5000):
+    """
+    Reconstruye la tabla del ranking desde users en una transacción y publica la nueva versión.
+    Es la única lectura completa de users; se ejecuta desde scripts/refresh_leaderboard.py.
+    """
+    session = new_session()
+    try:
+        now = datetime.utcnow()
+        session.query(LeaderboardEntry).delete(synchronize_session=False)
+
+        rows = session.execute(
+            User.__table__.select().with_only_columns(
+                User.id, User.name, User.email, User.total_xp
+            ).execution_options(yield_per=chunk_size)
+        )
+        total = 0
+        for chunk in rows.partitions():
+            session.execute(insert(LeaderboardEntry), [{
+                "user_id": row.id,
+                "name": row.name,
+                "institution": User.institution_for_email(row.email),
+                "total_xp": row.total_xp or 0,
+                "refreshed_at": now
+            } for row in chunk])
+            total += len(chunk)
+
+        bump_content_version(session, LEADERBOARD_SCOPE)
+        session.commit()
+        return total
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
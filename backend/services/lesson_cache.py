@@ -0,0 +1,162 @@
+# backend/services/lesson_cache.py
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from sqlalchemy.orm import undefer_group
+from database.db import new_session
+from models.lesson import Lesson
+from services.content_version_service import get_content_version, COURSES_SCOPE
+from config import Config
+
+# Brotli está en requirements.txt; si faltara en el entorno, solo se guarda la variante gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Codificaciones que get_lesson_payload puede servir (para el ETag por variante)
+LESSON_ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+def build_lesson_body(lesson):
+    """Cuerpo de /api/lessons/<id> (screens desempaquetados y tema visual)."""
+    screens_data = []
+    if lesson.screens:
+        if isinstance(lesson.screens, dict) and "screens" in lesson.screens:
+            screens_data = lesson.screens.get("screens", [])
+        elif isinstance(lesson.screens, list):
+            screens_data = lesson.screens
+
+    lesson_theme = lesson.content.get("theme") if lesson.content else None
+
+    return {
+        "success": True,
+        "id": lesson.id,
+        "title": lesson.title,
+        "description": lesson.description,
+        "type": lesson.type,        # Tipo de juego (crisis, tycoon, etc.)
+        "theme": lesson_theme,      # Colores (neón, oscuro, etc.)
+        "screens": screens_data,
+        "total_screens": len(screens_data),
+        "duration_minutes": lesson.duration_minutes,
+        "xp_reward": lesson.xp_reward or 20
+    }
+
+class LessonPayload:
+    """Lección ya serializada, con sus variantes comprimidas y el hash del contenido."""
+    __slots__ = ('body', 'gzip', 'brotli', 'content_hash', 'size')
+
+    def __init__(self, data):
+        self.body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.gzip = gzip.compress(self.body, compresslevel=6)
+        self.brotli = brotli.compress(self.body) if brotli else None
+        self.content_hash = hashlib.sha256(self.body).hexdigest()
+        self.size = len(self.body) + len(self.gzip) + (len(self.brotli) if self.brotli else 0)
+
+class LessonPayloadCache:
+    """LRU por bytes: expulsa las lecciones menos usadas al pasar el presupuesto de memoria."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.version = None
+        self._entries = OrderedDict()
+        self.bundle_hashes = {}
+        self._lock = threading.Lock()
+
+    def get(self, lesson_id, version):
+        with self._lock:
+            if version != self.version:
+                # Cambió el contenido de los cursos: todo lo guardado quedó obsoleto
+                self._entries.clear()
+                self.bundle_hashes = {}
+                self.current_bytes = 0
+                self.version = version
+                return None
+            payload = self._entries.get(lesson_id)
+            if payload is not None:
+                self._entries.move_to_end(lesson_id)
+            return payload
+
+    def get_bundle_hash(self, course_id, version):
+        with self._lock:
+            return self.bundle_hashes.get(course_id) if version == self.version else None
+
+    def put_bundle_hash(self, course_id, version, bundle_hash):
+        with self._lock:
+            if version == self.version:
+                self.bundle_hashes[course_id] = bundle_hash
+
+    def put(self, lesson_id, version, payload):
+        if payload.size > self.max_bytes:
+            return
+        with self._lock:
+            if version != self.version:
+                return
+            old = self._entries.pop(lesson_id, None)
+            if old is not None:
+                self.current_bytes -= old.size
+            self._entries[lesson_id] = payload
+            self.current_bytes += payload.size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.size
+
+_cache = LessonPayloadCache(Config.LESSON_CACHE_MAX_BYTES)
+
+def get_lesson_payload(session, lesson_id):
+    """Cuerpo serializado de la lección desde la caché (la carga de la BD solo en un fallo)."""
+    version = get_content_version(COURSES_SCOPE)
+    payload = _cache.get(lesson_id, version)
+    if payload is None:
+        lesson = session.query(Lesson).options(undefer_group('body')).filter_by(id=lesson_id).first()
+        if not lesson:
+            return None
+        payload = LessonPayload(build_lesson_body(lesson))
+        _cache.put(lesson_id, version, payload)
+    return payload
+
+# ==========================================
+# PAQUETES OFFLINE POR CURSO
+# ==========================================
+
+def get_bundle_hash(session, course_id, lesson_ids):
+    """
+    Hash del paquete de un curso: sha256 de los hashes de sus lecciones en orden.
+    Se calcula una vez por versión de contenido (llena la caché de lecciones de paso).
+    """
+    version = get_content_version(COURSES_SCOPE)
+    bundle_hash = _cache.get_bundle_hash(course_id, version)
+    if bundle_hash is None:
+        digest = hashlib.sha256()
+        for lesson_id in lesson_ids:
+            payload = get_lesson_payload(session, lesson_id)
+            if payload is not None:
+                digest.update(payload.content_hash.encode('ascii'))
+        bundle_hash = digest.hexdigest()
+        _cache.put_bundle_hash(course_id, version, bundle_hash)
+    return bundle_hash
+
+def iter_course_bundle(course_id, lesson_ids, bundle_hash):
+    """
+    Paquete NDJSON del curso: una línea de cabecera y luego una línea por lección
+    (el mismo cuerpo que /api/lessons/<id>). Se genera lección por lección desde la caché,
+    con su propia sesión porque se consume después de terminar el request.
+    """
+    header = {
+        "type": "bundle",
+        "course_id": course_id,
+        "hash": bundle_hash,
+        "total_lessons": len(lesson_ids)
+    }
+    yield json.dumps(header, separators=(',', ':')).encode('utf-8') + b"\n"
+
+    session = new_session()
+    try:
+        for lesson_id in lesson_ids:
+            payload = get_lesson_payload(session, lesson_id)
+            if payload is not None:
+                yield payload.body + b"\n"
+    finally:
+        session.close()
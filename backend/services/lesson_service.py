@@ -4,7 +4,9 @@ import uuid
 from models.lesson import Lesson as DBLesson
 from models.user_progress import UserLessonProgress, UserCourseProgress
 from database.db import get_session
-from sqlalchemy import desc
+from services.content_version_service import bump_content_version, COURSES_SCOPE
+from services.content_graph import get_content_graph
+from sqlalchemy import func, and_, exists, true, select
 
 def create_lesson(lesson_data: dict):
     """Crea una lección usando los datos del diccionario directamente."""
@@ -30,6 +32,7 @@ def create_lesson(lesson_data: dict):
         )
         
         session.add(new_lesson)
+        bump_content_version(session, COURSES_SCOPE)
         session.commit()
         return new_lesson.id
 
@@ -39,26 +42,62 @@ def create_lesson(lesson_data: dict):
     finally:
         session.close()
 
+def _course_completed(user_id, course_id):
+    return exists().where(
+        UserCourseProgress.user_id == user_id,
+        UserCourseProgress.course_id == course_id,
+        UserCourseProgress.percentage >= 100
+    )
+
+def get_lesson_lock(session, user_id: int, lesson_id: str, check_course=True):
+    """
+    Motivo de bloqueo de la lección según el grafo de contenido, o None si está desbloqueada.
+    Devuelve ("course", id_curso_requerido) o ("lesson", nodo_anterior).
+    Todo se resuelve en una sola consulta de EXISTS (ninguna si no hay nada que verificar).
+    """
+    graph = get_content_graph()
+    node = graph.lesson(lesson_id)
+    previous = graph.predecessor(lesson_id)
+    required_courses = graph.prerequisites(node.course_id) if check_course else ()
+    if previous is None and not required_courses:
+        return None
+
+    probes = [_course_completed(user_id, course_id) for course_id in required_courses]
+    if previous is not None:
+        probes.append(exists().where(
+            UserLessonProgress.user_id == user_id,
+            UserLessonProgress.lesson_id == previous.id,
+            UserLessonProgress.completed == True
+        ))
+    results = session.execute(select(*probes)).one()
+
+    for course_id, completed in zip(required_courses, results):
+        if not completed:
+            return ("course", course_id)
+    if previous is not None and not results[-1]:
+        return ("lesson", previous)
+    return None
+
 def is_course_accessible(user_id: int, course_id: int):
     """Verifica si un curso está accesible (Prerrequisitos de cursos)."""
+    required_courses = get_content_graph().prerequisites(course_id)
+    if not required_courses:
+        return {"accessible": True, "reason": "Curso inicial"}
+
     session = get_session()
     try:
-        if course_id == 1:
-            return {"accessible": True, "reason": "Curso inicial"}
-        
-        required_course_id = course_id - 1
-        required_progress = session.query(UserCourseProgress).filter_by(
-            user_id=user_id, course_id=required_course_id
-        ).first()
-        
-        if not required_progress or required_progress.percentage < 100:
-            return {
-                "accessible": False,
-                "reason": f"Debes completar el Curso {required_course_id} primero",
-                "required_course_id": required_course_id
-            }
+        results = session.execute(
+            select(*[_course_completed(user_id, c) for c in required_courses])
+        ).one()
+        for required_course_id, completed in zip(required_courses, results):
+            if not completed:
+                return {
+                    "accessible": False,
+                    "reason": f"Debes completar el Curso {required_course_id} primero",
+                    "required_course_id": required_course_id
+                }
         
-        return {"accessible": True, "reason": f"Curso {required_course_id} completado"}
+        return {"accessible": True, "reason": f"Curso {required_courses[-1]} completado"}
     finally:
         session.close()
 
@@ -66,29 +105,22 @@ def get_lesson_content(user_id: int, lesson_id: str):
     """Recupera el contenido de una lección (solo si está desbloqueada)."""
     session = get_session()
     try:
+        if get_content_graph().lesson(lesson_id) is None:
+            return {"error": "Lección no encontrada"}, 404
+
+        # Verificar curso y lección anterior (Secuencialidad) en un solo probe
+        lock = get_lesson_lock(session, user_id, lesson_id)
+        if lock is not None:
+            kind, target = lock
+            if kind == "course":
+                return {"error": "Curso bloqueado", "message": f"Debes completar el Curso {target} primero"}, 403
+            return {"error": "Lección bloqueada", "message": f"Completa '{target.title}' primero"}, 403
+
+        # content/screens están diferidos: solo se leen si la lección está desbloqueada
         lesson = session.query(DBLesson).filter_by(id=lesson_id).first()
         if not lesson:
             return {"error": "Lección no encontrada"}, 404
 
-        # Verificar curso
-        course_access = is_course_accessible(user_id, lesson.course_id)
-        if not course_access["accessible"]:
-            return {"error": "Curso bloqueado", "message": course_access["reason"]}, 403
-        
-        # Verificar lección anterior (Secuencialidad)
-        if lesson.order_index > 1:
-            prev = session.query(DBLesson).filter(
-                DBLesson.course_id == lesson.course_id,
-                DBLesson.order_index < lesson.order_index
-            ).order_by(desc(DBLesson.order_index)).first()
-            
-            if prev:
-                prog = session.query(UserLessonProgress).filter_by(
-                    user_id=user_id, lesson_id=prev.id, completed=True
-                ).first()
-                if not prog:
-                    return {"error": "Lección bloqueada", "message": f"Completa '{prev.title}' primero"}, 403
-
         return {
             "success": True,
             "id": lesson.id,
@@ -110,48 +142,53 @@ def get_lesson_content(user_id: int, lesson_id: str):
         session.close()
 
 def get_course_lessons_with_status(user_id: int, course_id: int):
+    """
+    Lecciones del curso con su estado de bloqueo en UNA sola consulta:
+    LEFT JOIN al progreso del usuario + LAG() sobre order_index para saber si la
+    lección anterior está completada + EXISTS de los cursos prerrequisito (grafo de contenido).
+    """
     session = get_session()
     try:
-        course_access = is_course_accessible(user_id, course_id)
-        is_course_locked = not course_access["accessible"]
-        
-        lessons = session.query(DBLesson).filter_by(course_id=course_id).order_by(DBLesson.order_index).all()
-        if not lessons: 
-            return []
-        
-        result = []
-        previous_lesson_completed = True  # Primera lección siempre desbloqueada
-        
-        for i, lesson in enumerate(lessons):
-            progress = session.query(UserLessonProgress).filter_by(
-                user_id=user_id, lesson_id=lesson.id
-            ).first()
-            
-            is_completed = progress.completed if progress else False
-            
-            # Lógica de bloqueo clara
-            if is_course_locked:
-                is_locked = True
-            elif i == 0:
-                is_locked = False  # Primera lección SIEMPRE desbloqueada
-            else:
-                is_locked = not previous_lesson_completed
-            
-            result.append({
-                "id": lesson.id,
-                "course_id": lesson.course_id,
-                "title": lesson.title,
-                "description": lesson.description,
-                "type": lesson.type,
-                "duration_minutes": lesson.duration_minutes,
-                "xp_reward": lesson.xp_reward,
-                "order_index": lesson.order_index,
-                "is_completed": is_completed,
-                "is_locked": is_locked 
-            })
-            
-            previous_lesson_completed = is_completed
-        
-        return result
+        is_completed = func.coalesce(UserLessonProgress.completed, False)
+
+        # La primera lección no tiene anterior: LAG devuelve el default (true)
+        previous_completed = func.lag(is_completed, 1, true()).over(
+            order_by=(DBLesson.order_index, DBLesson.id)
+        )
+
+        required_courses = get_content_graph().prerequisites(course_id)
+        course_accessible = and_(true(), *[_course_completed(user_id, c) for c in required_courses])
+
+        rows = session.query(
+            DBLesson.id,
+            DBLesson.course_id,
+            DBLesson.title,
+            DBLesson.description,
+            DBLesson.type,
+            DBLesson.duration_minutes,
+            DBLesson.xp_reward,
+            DBLesson.order_index,
+            is_completed.label('is_completed'),
+            previous_completed.label('previous_completed'),
+            course_accessible.label('course_accessible')
+        ).outerjoin(
+            UserLessonProgress,
+            and_(UserLessonProgress.lesson_id == DBLesson.id, UserLessonProgress.user_id == user_id)
+        ).filter(
+            DBLesson.course_id == course_id
+        ).order_by(DBLesson.order_index, DBLesson.id).all()
+
+        return [{
+            "id": row.id,
+            "course_id": row.course_id,
+            "title": row.title,
+            "description": row.description,
+            "type": row.type,
+            "duration_minutes": row.duration_minutes,
+            "xp_reward": row.xp_reward,
+            "order_index": row.order_index,
+            "is_completed": bool(row.is_completed),
+            "is_locked": not row.course_accessible or not row.previous_completed
+        } for row in rows]
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
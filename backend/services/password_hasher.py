@@ -0,0 +1,67 @@
+# backend/services/password_hasher.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from config import Config
+
+class PasswordHasherBusy(Exception):
+    """El pool de bcrypt está saturado: se rechaza en vez de encolar sin límite."""
+
+_pool = None
+_pool_lock = threading.Lock()
+_pending = 0
+_pending_lock = threading.Lock()
+
+def _get_pool():
+    """
+    Pool de hilos reales para bcrypt (libera el GIL mientras calcula).
+    Con workers gevent se usa el ThreadPool de gevent: el greenlet espera sin bloquear
+    al resto del worker. Se crea al primer uso, ya dentro del worker.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                try:
+                    from gevent import monkey
+                    from gevent.threadpool import ThreadPool
+                    if monkey.is_module_patched('threading'):
+                        _pool = ThreadPool(Config.BCRYPT_POOL_SIZE)
+                except ImportError:
+                    pass
+                if _pool is None:
+                    _pool = ThreadPoolExecutor(max_workers=Config.BCRYPT_POOL_SIZE, thread_name_prefix='bcrypt')
+    return _pool
+
+def _run(fn, *args):
+    global _pending
+    with _pending_lock:
+        if _pending >= Config.BCRYPT_MAX_PENDING:
+            raise PasswordHasherBusy("Servidor ocupado, intenta de nuevo en unos segundos")
+        _pending += 1
+    try:
+        pool = _get_pool()
+        if isinstance(pool, ThreadPoolExecutor):
+            return pool.submit(fn, *args).result()
+        return pool.apply(fn, args)
+    finally:
+        with _pending_lock:
+            _pending -= 1
+
+def hash_password(password: str) -> str:
+    """Hash bcrypt con el costo configurado (BCRYPT_ROUNDS), calculado en el pool."""
+    salt = bcrypt.gensalt(rounds=Config.BCRYPT_ROUNDS)
+    return _run(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+def verify_password(password: str, password_hash: str) -> bool:
+    return _run(bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+def needs_rehash(password_hash: str) -> bool:
+    """True si el hash se generó con otro costo ('$2b$12$...') distinto al configurado."""
+    try:
+        return int(password_hash.split('$')[2]) != Config.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+def get_pool_stats():
+    return {"pending": _pending, "max_pending": Config.BCRYPT_MAX_PENDING, "pool_size": Config.BCRYPT_POOL_SIZE}
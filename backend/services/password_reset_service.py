@@ -1,11 +1,12 @@
 # backend/services/password_reset_service.py
 import secrets
 import string
-import bcrypt
+from services.password_hasher import hash_password, PasswordHasherBusy
 from database.db import get_session
 from models.password_reset_code import PasswordResetCode
 from models.user import User
 from models.refresh_token import RefreshToken  
+from services.token_cache import revoke_user_tokens
 from datetime import datetime, timedelta
 from services.email_service import EmailService
 from sqlalchemy import func  # ✅ IMPORTANTE: Para búsquedas case-insensitive
@@ -136,19 +137,23 @@ def reset_password(email: str, code: str, new_password: str):
             raise ValueError("Código inválido o expirado")
 
         # Actualizar contraseña
-        user.password_hash = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        user.password_hash = hash_password(new_password)
 
         # Marcar código como usado
         reset_code.used = True
         
         # Cerrar sesión en otros dispositivos
-        session.query(RefreshToken).filter_by(user_id=user.id).update({"revoked": True})
+        session.query(RefreshToken).filter_by(user_id=user.id, revoked=False).update({"revoked": True})
+        revoke_user_tokens(session, user.id)
 
         session.commit()
         print(f"✅ Contraseña actualizada exitosamente para: {user.email}")
         return {"success": True, "message": "Contraseña actualizada correctamente"}
     except ValueError:
         raise  # Re-lanzar ValueError para que el endpoint lo capture
+    except PasswordHasherBusy:
+        session.rollback()
+        raise  # El endpoint responde 503
     except Exception as e:
         session.rollback()
         print(f"❌ Error en reset_password: {str(e)}")
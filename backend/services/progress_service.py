@@ -1,123 +1,163 @@
 # backend/services/progress_service.py
 from database.db import get_session
 from models.user_progress import UserCourseProgress, UserLessonProgress
-from models.lesson import Lesson
 from models.course import Course
 from models.user import User
+from models.progress_sync_receipt import ProgressSyncReceipt
 from services.activity_service import ActivityService
-from services.badge_service import BadgeService
+from services.badge_service import BadgeService, XP_EVENT, LESSON_EVENT, COURSE_EVENT, STREAK_EVENT
+from services.content_graph import get_content_graph
+from services.streak_service import StreakService
+from sqlalchemy import func, update, case, and_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from datetime import datetime
 
 activity_service = ActivityService()
 
+def _upsert_lesson_completion(session, user_id, lesson_id, now):
+    """
+    Marca la lección como completada con un solo INSERT ... ON CONFLICT.
+    Devuelve True solo si esta llamada la completó (la fila está bloqueada durante
+    el upsert, así dos requests simultáneos nunca la cuentan dos veces).
+    """
+    table = UserLessonProgress.__table__
+    stmt = pg_insert(table).values(
+        user_id=user_id, lesson_id=lesson_id, completed=True, completed_at=now, attempts=1
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.lesson_id],
+        set_={
+            "completed": True,
+            "completed_at": now,
+            "attempts": func.coalesce(table.c.attempts, 0) + 1
+        },
+        where=func.coalesce(table.c.completed, False) == False
+    ).returning(table.c.id)
+    if session.execute(stmt).first() is not None:
+        return True
+
+    # Ya estaba completada: solo sumar el intento
+    session.execute(
+        update(table)
+        .where(table.c.user_id == user_id, table.c.lesson_id == lesson_id)
+        .values(attempts=func.coalesce(table.c.attempts, 0) + 1)
+    )
+    return False
+
+def _increment_course_progress(session, user_id, course_id, total_lessons, now):
+    """Suma una lección completada al progreso del curso (upsert atómico, sin recontar)."""
+    table = UserCourseProgress.__table__
+    first_percentage = min(100, 100 // total_lessons) if total_lessons else 0
+    stmt = pg_insert(table).values(
+        user_id=user_id, course_id=course_id, completed_lessons=1,
+        total_lessons=total_lessons, percentage=first_percentage,
+        completed_at=now if first_percentage == 100 else None, updated_at=now
+    )
+    completed_lessons = func.coalesce(table.c.completed_lessons, 0) + 1
+    percentage = func.least(100, completed_lessons * 100 // func.greatest(total_lessons, 1))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.course_id],
+        set_={
+            "completed_lessons": completed_lessons,
+            "total_lessons": total_lessons,
+            "percentage": percentage,
+            "completed_at": case(
+                (and_(percentage >= 100, table.c.completed_at.is_(None)), now),
+                else_=table.c.completed_at
+            ),
+            "updated_at": now
+        }
+    ).returning(table.c.completed_lessons, table.c.total_lessons, table.c.percentage)
+    return session.execute(stmt).one()
+
+def apply_lesson_completion(session, user_id: int, node, now=None):
+    """
+    Aplica la finalización de una lección dentro de la sesión dada (sin commit ni insignias).
+    XP y contadores del curso se actualizan de forma atómica en la BD, sin leer y reescribir.
+    Devuelve (xp_ganado, progreso_del_curso).
+    """
+    now = now or datetime.utcnow()
+    graph = get_content_graph()
+
+    # Completar una lección cuenta como actividad del día para la racha
+    StreakService().mark_active(user_id, session=session)
+
+    # Si ya estaba completada → no dar XP de nuevo
+    xp_earned = 0
+    if _upsert_lesson_completion(session, user_id, node.id, now):
+        xp_earned = node.xp_reward if node.xp_reward else 20
+        session.execute(
+            update(User.__table__)
+            .where(User.__table__.c.id == user_id)
+            .values(total_xp=func.coalesce(User.__table__.c.total_xp, 0) + xp_earned)
+        )
+
+        # Registrar actividad solo si se ganó XP
+        activity_service.create_activity(
+            user_id=user_id,
+            activity_type="lesson_completed",
+            points=xp_earned,
+            lesson_id=node.id,
+            description=f"Lección {node.id} completada",
+            session=session
+        )
+
+        progress = _increment_course_progress(
+            session, user_id, node.course_id, graph.lesson_count(node.course_id), now
+        )
+    else:
+        progress = session.query(
+            UserCourseProgress.completed_lessons,
+            UserCourseProgress.total_lessons,
+            UserCourseProgress.percentage
+        ).filter_by(user_id=user_id, course_id=node.course_id).first()
+
+    completed_count = progress.completed_lessons if progress else 0
+    total_lessons = progress.total_lessons if progress else graph.lesson_count(node.course_id)
+    percentage = progress.percentage if progress else 0
+    return xp_earned, {
+        "course_id": node.course_id,
+        "title": graph.course_titles.get(node.course_id) or "Curso",
+        "percentage": percentage,
+        "completed_lessons": completed_count,
+        "total_lessons": total_lessons,
+        "completed": percentage == 100
+    }
+
+def completion_events(xp_earned, course_progress):
+    """Eventos de insignias que produce una finalización (la racha se revisa siempre)."""
+    if not xp_earned:
+        return {STREAK_EVENT}
+    events = {XP_EVENT, LESSON_EVENT, STREAK_EVENT}
+    if course_progress["completed"]:
+        events.add(COURSE_EVENT)
+    return events
 
 def mark_lesson_completed(user_id: int, lesson_id: str):
     session = get_session()
     try:
-        user = session.query(User).filter_by(id=user_id).first()
-        if not user:
+        if session.query(User.id).filter_by(id=user_id).first() is None:
             return {"error": "user_not_found"}
 
-        lesson = session.query(Lesson).filter_by(id=lesson_id).first()
-        if not lesson:
+        node = get_content_graph().lesson(lesson_id)
+        if node is None:
             return {"error": "lesson_not_found"}
 
-        course = session.query(Course).filter_by(id=lesson.course_id).first()
-
-        # Verificar si ya estaba completada
-        progress = session.query(UserLessonProgress).filter_by(
-            user_id=user_id, lesson_id=lesson_id
-        ).first()
-
-        # Calcular XP a otorgar
-        xp_amount = lesson.xp_reward if lesson.xp_reward else 20
-
-        # Si ya estaba completada → no dar XP de nuevo
-        xp_earned = 0
-        if not progress or not progress.completed:
-            xp_earned = xp_amount
-            current_xp = user.total_xp if user.total_xp is not None else 0
-            user.total_xp = current_xp + xp_earned
-
-        # Crear o actualizar progreso de la lección
-        if not progress:
-            progress = UserLessonProgress(
-                user_id=user_id,
-                lesson_id=lesson_id,
-                completed=True,
-                completed_at=datetime.utcnow(),
-                attempts=1
-            )
-            session.add(progress)
-        else:
-            if not progress.completed:
-                progress.completed = True
-                progress.completed_at = datetime.utcnow()
-            progress.attempts += 1
+        xp_earned, course_progress = apply_lesson_completion(session, user_id, node)
 
-        # Registrar actividad solo si se ganó XP
-        if xp_earned > 0:
-            activity_service.create_activity(
-                user_id=user_id,
-                activity_type="lesson_completed",
-                points=xp_earned,
-                lesson_id=lesson_id,
-                description=f"Lección {lesson_id} completada",
-                session=session
-            )
-
-        # Calcular progreso del curso
-        total_lessons = session.query(Lesson).filter_by(course_id=lesson.course_id).count()
-        completed_count = session.query(UserLessonProgress).join(Lesson).filter(
-            UserLessonProgress.user_id == user_id,
-            Lesson.course_id == lesson.course_id,
-            UserLessonProgress.completed == True
-        ).count()
-
-        percentage = int((completed_count / total_lessons) * 100) if total_lessons > 0 else 0
-
-        # Actualizar progreso del curso
-        course_prog = session.query(UserCourseProgress).filter_by(
-            user_id=user_id, course_id=lesson.course_id
-        ).first()
-
-        if not course_prog:
-            course_prog = UserCourseProgress(
-                user_id=user_id,
-                course_id=lesson.course_id,
-                completed_lessons=completed_count,
-                total_lessons=total_lessons,
-                percentage=percentage
-            )
-            session.add(course_prog)
-        else:
-            course_prog.completed_lessons = completed_count
-            course_prog.total_lessons = total_lessons
-            course_prog.percentage = percentage
-            if percentage == 100 and not course_prog.completed_at:
-                course_prog.completed_at = datetime.utcnow()
-
-        # Detectar nuevas insignias
-        session.flush()
+        # Detectar nuevas insignias (lee el XP ya actualizado en la BD)
         badge_service = BadgeService()
-        new_badges = badge_service.check_and_award_badges(user_id, session)
+        new_badges = badge_service.evaluate(
+            user_id, session, completion_events(xp_earned, course_progress)
+        )
 
-        # COMMIT + REFRESH (¡ESTO ES LO QUE ARREGLA EL PROBLEMA DEL XP!)
         session.commit()
-        session.refresh(user)   # ← ¡AQUÍ ESTÁ LA MAGIA!
 
         return {
             "lesson_completed": True,
             "xp_earned": xp_earned,
             "new_badges": new_badges,
-            "course_progress": {
-                "course_id": lesson.course_id,
-                "title": course.title if course else "Curso",
-                "percentage": percentage,
-                "completed_lessons": completed_count,
-                "total_lessons": total_lessons,
-                "completed": percentage == 100
-            }
+            "course_progress": course_progress
         }
 
     except Exception as e:
@@ -128,6 +168,127 @@ def mark_lesson_completed(user_id: int, lesson_id: str):
         session.close()
 
 
+MAX_SYNC_EVENTS = 100
+
+def _parse_sync_events(events):
+    if not isinstance(events, list):
+        raise ValueError("'events' debe ser una lista")
+    if len(events) > MAX_SYNC_EVENTS:
+        raise ValueError(f"Máximo {MAX_SYNC_EVENTS} eventos por sincronización")
+
+    parsed = []
+    for event in events:
+        if not isinstance(event, dict):
+            raise ValueError("Cada evento debe ser un objeto")
+        key = event.get('idempotency_key')
+        lesson_id = event.get('lesson_id')
+        if not isinstance(key, str) or not key or len(key) > 100:
+            raise ValueError("Cada evento necesita 'idempotency_key' (texto de hasta 100 caracteres)")
+        if not isinstance(lesson_id, str) or not lesson_id:
+            raise ValueError("Cada evento necesita 'lesson_id'")
+        parsed.append((key, lesson_id))
+    return parsed
+
+def sync_lesson_completions(user_id: int, events):
+    """
+    Aplica en una sola transacción una lista ordenada de lecciones completadas offline.
+    Cada evento trae una clave de idempotencia: los reintentos devuelven el resultado
+    guardado sin volver a aplicarlo. Las insignias se evalúan una sola vez al final.
+    """
+    parsed = _parse_sync_events(events)
+
+    session = get_session()
+    try:
+        if session.query(User.id).filter_by(id=user_id).first() is None:
+            return {"error": "user_not_found"}
+
+        graph = get_content_graph()
+        now = datetime.utcnow()
+        receipts = ProgressSyncReceipt.__table__
+        results = []
+        courses = {}
+        events = set()
+
+        for key, lesson_id in parsed:
+            node = graph.lesson(lesson_id)
+            if node is None:
+                results.append({"idempotency_key": key, "lesson_id": lesson_id, "status": "lesson_not_found"})
+                continue
+
+            # Reservar la clave primero: un reintento concurrente espera y luego no inserta nada
+            claimed = session.execute(
+                pg_insert(receipts).values(
+                    user_id=user_id, idempotency_key=key, lesson_id=lesson_id,
+                    xp_earned=0, created_at=now
+                ).on_conflict_do_nothing(
+                    index_elements=[receipts.c.user_id, receipts.c.idempotency_key]
+                ).returning(receipts.c.id)
+            ).first()
+
+            if claimed is None:
+                courses.setdefault(node.course_id, None)
+                previous = session.query(ProgressSyncReceipt.xp_earned).filter_by(
+                    user_id=user_id, idempotency_key=key
+                ).first()
+                results.append({
+                    "idempotency_key": key,
+                    "lesson_id": lesson_id,
+                    "status": "duplicate",
+                    "xp_earned": previous.xp_earned if previous else 0
+                })
+                continue
+
+            xp_earned, course_progress = apply_lesson_completion(session, user_id, node, now)
+            if xp_earned:
+                session.execute(
+                    update(receipts).where(receipts.c.id == claimed.id).values(xp_earned=xp_earned)
+                )
+            courses[node.course_id] = course_progress
+            events |= completion_events(xp_earned, course_progress)
+            results.append({
+                "idempotency_key": key,
+                "lesson_id": lesson_id,
+                "status": "applied",
+                "xp_earned": xp_earned
+            })
+
+        # Estado final de los cursos tocados (los que solo tuvieron duplicados se leen aquí)
+        missing = [course_id for course_id, progress in courses.items() if progress is None]
+        if missing:
+            rows = session.query(UserCourseProgress).filter(
+                UserCourseProgress.user_id == user_id,
+                UserCourseProgress.course_id.in_(missing)
+            ).all()
+            for row in rows:
+                courses[row.course_id] = {
+                    "course_id": row.course_id,
+                    "title": graph.course_titles.get(row.course_id) or "Curso",
+                    "percentage": row.percentage,
+                    "completed_lessons": row.completed_lessons,
+                    "total_lessons": row.total_lessons,
+                    "completed": row.percentage == 100
+                }
+
+        new_badges = BadgeService().evaluate(user_id, session, events)
+
+        total_xp = session.query(User.total_xp).filter_by(id=user_id).scalar() or 0
+        session.commit()
+
+        return {
+            "results": results,
+            "total_xp": total_xp,
+            "new_badges": new_badges,
+            "course_progress": [p for p in courses.values() if p is not None]
+        }
+
+    except Exception as e:
+        session.rollback()
+        print(f"Error en sincronización de progreso: {e}")
+        raise e
+    finally:
+        session.close()
+
+
 # La otra función la dejas tal cual
 def get_user_course_progress(user_id: int, course_id: int = None):
     session = get_session()
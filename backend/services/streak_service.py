@@ -1,65 +1,109 @@
 # backend/services/streak_service.py
-from database.db import get_session
-from models.user import User
+import threading
+from database.db import get_session, new_session
+from models.user_activity_day import UserActivityDay
+from sqlalchemy import desc, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from datetime import datetime, timedelta
 
+# Caché por proceso del día actual: usuarios ya marcados hoy y rachas ya calculadas.
+# Se vacía sola al cambiar de día.
+_today = None
+_marked = set()
+_streaks = {}
+_lock = threading.Lock()
+
+def _current_day():
+    """Día UTC actual; al cambiar de día se descarta la caché del día anterior."""
+    global _today, _marked, _streaks
+    today = datetime.utcnow().date()
+    if today != _today:
+        with _lock:
+            if today != _today:
+                _marked = set()
+                _streaks = {}
+                _today = today
+    return today
+
 class StreakService:
-    def update_and_get_streak(self, user_id: int):
+    def mark_active(self, user_id: int, session=None):
         """
-        Registra la visita de hoy y calcula la racha actual.
-        Si es la primera vez que entra, o perdió la racha, la inicia en 1.
+        Registra que el usuario tuvo actividad hoy (como máximo una escritura por usuario y día
+        en cada worker). No toca la fila de users.
+        
+        Args:
+            session: Si se provee, usa esta sesión existente (NO hace commit).
         """
-        session = get_session()
-        try:
-            user = session.query(User).filter_by(id=user_id).first()
-            if not user:
-                return 0
-
-            today = datetime.utcnow().date()
-            last_date = user.last_activity_date
+        today = _current_day()
+        if user_id in _marked:
+            return
 
-            # CASO 1: Usuario nuevo o nunca ha tenido actividad
-            # Solución al problema: Inicia en 1 inmediatamente.
-            if last_date is None:
-                user.current_streak = 1
-                user.last_activity_date = today
+        own_session = session is None
+        if own_session:
+            session = get_session()
+        try:
+            table = UserActivityDay.__table__
+            session.execute(
+                pg_insert(table).values(user_id=user_id, day=today).on_conflict_do_nothing()
+            )
+            _streaks.pop(user_id, None)
+            if own_session:
                 session.commit()
-                return 1
+                _marked.add(user_id)
+        except Exception as e:
+            print(f"Error registrando actividad: {e}")
+            if own_session:
+                session.rollback()
+            else:
+                raise
+        finally:
+            if own_session:
+                session.close()
 
-            # CASO 2: El usuario ya entró hoy (No hacemos nada, devolvemos el valor actual)
-            if last_date == today:
-                return user.current_streak
+    def get_current_streak(self, user_id: int, session=None):
+        """
+        Días consecutivos con actividad terminando hoy (o ayer, si hoy aún no hubo actividad).
+        Solo lectura: recorre los días del más reciente hacia atrás hasta el primer hueco.
 
-            # CASO 3: El usuario entró ayer (Racha continúa)
-            # Si la última actividad fue ayer, sumamos 1.
-            if last_date == today - timedelta(days=1):
-                user.current_streak += 1
-                user.last_activity_date = today
-                # Actualizar max_streak si se supera
-                if user.current_streak > (user.max_streak or 0):
-                    user.max_streak = user.current_streak
-                session.commit()
-                return user.current_streak
+        Args:
+            session: Si se provee, lee dentro de la transacción del llamador; ese resultado
+                puede incluir escrituras sin confirmar y por eso no se guarda en la caché.
+        """
+        today = _current_day()
+        cached = _streaks.get(user_id)
+        if cached is not None:
+            return cached
 
-            # CASO 4: El usuario rompió la racha (entró hace 2 días o más)
-            # Reiniciamos a 1 (porque hoy cuenta como el primer día de la nueva racha)
-            user.current_streak = 1
-            user.last_activity_date = today
-            session.commit()
-            return 1
+        own_session = session is None
+        if own_session:
+            # Sesión independiente: solo ve datos confirmados, que sí se pueden cachear
+            session = new_session()
+        try:
+            days = session.execute(
+                select(UserActivityDay.day)
+                .where(UserActivityDay.user_id == user_id)
+                .order_by(desc(UserActivityDay.day))
+                .execution_options(yield_per=64)
+            ).scalars()
 
-        except Exception as e:
-            print(f"Error actualizando racha: {e}")
-            session.rollback()
-            return 0
-        finally:
-            session.close()
+            streak = 0
+            latest = expected = None
+            for day in days:
+                if latest is None:
+                    # La racha sigue viva si la última actividad fue hoy o ayer
+                    if day < today - timedelta(days=1):
+                        break
+                    latest = expected = day
+                if day != expected:
+                    break
+                streak += 1
+                expected = day - timedelta(days=1)
+            days.close()
 
-    def get_current_streak(self, user_id: int):
-        """Solo lee la racha sin modificarla (útil para perfil u otras vistas)."""
-        session = get_session()
-        try:
-            user = session.query(User).filter_by(id=user_id).first()
-            return user.current_streak if user else 0
+            # Con la actividad de hoy ya confirmada, el valor no cambia en el resto del día
+            if own_session and latest == today:
+                _streaks[user_id] = streak
+            return streak
         finally:
-            session.close()
\ No newline at end of file
+            if own_session:
+                session.close()
@@ -0,0 +1,115 @@
+# backend/services/sync_service.py
+from database.db import get_session
+from models.glossary import Glossary
+from models.course import Course
+from models.lesson import Lesson
+from models.content_tombstone import ContentTombstone
+from sqlalchemy import func, select, DateTime
+from sqlalchemy.orm import load_only
+from datetime import datetime, timedelta
+from config import Config
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+def _to_version(moment):
+    """Versión de sincronización = microsegundos UTC desde epoch (0 si no hay contenido)."""
+    if moment is None:
+        return 0
+    return (moment - _EPOCH) // _MICROSECOND
+
+def _from_version(version):
+    return _EPOCH + version * _MICROSECOND
+
+def _course_to_dict(course):
+    return {
+        "id": course.id,
+        "title": course.title,
+        "description": course.description,
+        "level": course.level,
+        "image_url": course.image_url,
+        "xp_reward": course.xp_reward or 0
+    }
+
+def _lesson_metadata(lesson):
+    """Metadatos de la lección (sin content/screens: el cuerpo se descarga aparte)."""
+    return {
+        "id": lesson.id,
+        "course_id": lesson.course_id,
+        "title": lesson.title,
+        "description": lesson.description,
+        "type": lesson.type,
+        "total_screens": lesson.total_screens,
+        "duration_minutes": lesson.duration_minutes,
+        "xp_reward": lesson.xp_reward,
+        "order_index": lesson.order_index
+    }
+
+def get_catalog_version(session):
+    """
+    Versión actual del catálogo: último cambio o borrado en glosario, cursos o lecciones,
+    acotada a ahora - SYNC_WATERMARK_OVERLAP_SECONDS.
+
+    updated_at se asigna al escribir, no al hacer commit: una transacción lenta puede
+    confirmar un cambio con fecha anterior a una versión que el cliente ya recibió.
+    Mientras haya cambios recientes la versión se queda atrás de ellos y el cliente los
+    vuelve a recibir (los aplica como upsert) hasta que la ventana queda cerrada.
+    """
+    latest = session.execute(select(func.greatest(
+        select(func.max(Glossary.updated_at)).scalar_subquery(),
+        select(func.max(Course.updated_at)).scalar_subquery(),
+        select(func.max(Lesson.updated_at)).scalar_subquery(),
+        select(func.max(ContentTombstone.deleted_at)).scalar_subquery(),
+        type_=DateTime
+    ))).scalar()
+    if latest is None:
+        return 0
+    settled = datetime.utcnow() - timedelta(seconds=Config.SYNC_WATERMARK_OVERLAP_SECONDS)
+    return _to_version(min(latest, settled))
+
+def get_catalog_changes(since=None):
+    """
+    Cambios del catálogo (glosario, cursos y metadatos de lecciones) desde la versión `since`.
+    Sin `since` devuelve todo. Si no hubo cambios la respuesta solo trae la versión.
+    """
+    session = get_session()
+    try:
+        version = get_catalog_version(session)
+        if since and version <= since:
+            return {"version": version, "changed": False}
+
+        since_dt = _from_version(since) if since else None
+
+        def changed(model):
+            q = session.query(model)
+            if since_dt is not None:
+                q = q.filter(model.updated_at > since_dt)
+            return q
+
+        glossary = changed(Glossary).order_by(Glossary.id).all()
+        courses = changed(Course).order_by(Course.id).all()
+        lessons = changed(Lesson).options(load_only(
+            Lesson.id, Lesson.course_id, Lesson.title, Lesson.description, Lesson.type,
+            Lesson.total_screens, Lesson.duration_minutes, Lesson.xp_reward, Lesson.order_index
+        )).order_by(Lesson.course_id, Lesson.order_index).all()
+
+        deleted = {"glossary": [], "course": [], "lesson": []}
+        if since_dt is not None:
+            tombstones = session.query(ContentTombstone).filter(
+                ContentTombstone.deleted_at > since_dt
+            ).all()
+            for t in tombstones:
+                deleted.setdefault(t.entity, []).append(
+                    t.entity_id if t.entity == 'lesson' else int(t.entity_id)
+                )
+
+        return {
+            "version": version,
+            "changed": True,
+            "full": since_dt is None,
+            "glossary": {"upserted": [g.to_dict() for g in glossary], "deleted": deleted["glossary"]},
+            "courses": {"upserted": [_course_to_dict(c) for c in courses], "deleted": deleted["course"]},
+            "lessons": {"upserted": [_lesson_metadata(l) for l in lessons], "deleted": deleted["lesson"]}
+        }
+    finally:
+        session.close()
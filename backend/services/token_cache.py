@@ -0,0 +1,188 @@
+# backend/services/token_cache.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+import jwt
+from database.db import new_session
+from models.token_revocation import TokenRevocation
+from services.content_version_service import get_content_version, bump_content_version, AUTH_SCOPE
+from config import Config
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode('utf-8')).digest()
+
+def _utc_timestamp(moment):
+    return moment.replace(tzinfo=timezone.utc).timestamp()
+
+class VerifiedTokenCache:
+    """
+    LRU de access tokens ya verificados: digest -> (claims, vigente hasta).
+    Una entrada vive hasta el 'exp' del token o TOKEN_CACHE_TTL_SECONDS, lo que llegue antes.
+    """
+
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.verify_seconds = 0.0   # tiempo total de jwt.decode en los fallos
+
+    def get(self, digest):
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                if time.time() < entry[1]:
+                    self._entries.move_to_end(digest)
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[digest]
+            self.misses += 1
+            return None
+
+    def put(self, digest, claims, verify_seconds):
+        valid_until = min(claims.get('exp', float('inf')), time.time() + self.ttl_seconds)
+        with self._lock:
+            self.verify_seconds += verify_seconds
+            self._entries[digest] = (claims, valid_until)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            verify_avg = self.verify_seconds / self.misses if self.misses else 0.0
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "avg_verify_us": round(verify_avg * 1e6, 1),
+                # Estimación: cada acierto evita una verificación completa del JWT
+                "saved_cpu_ms": round(self.hits * verify_avg * 1e3, 1)
+            }
+
+class RevocationList:
+    """
+    Copia por worker de las revocaciones vigentes (token_revocations). Se recarga cuando
+    cambia la versión AUTH_SCOPE, consultada como máximo cada TOKEN_REVOCATION_CHECK_SECONDS.
+    Solo contiene filas que no vencieron, así que es pequeña (vida de un access token).
+    """
+
+    def __init__(self):
+        self.version = None
+        self.tokens = frozenset()   # digests revocados
+        self.users = {}             # user_id -> tokens emitidos antes de este timestamp
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        version = get_content_version(AUTH_SCOPE, max_age=Config.TOKEN_REVOCATION_CHECK_SECONDS)
+        if version == self.version:
+            return
+        with self._lock:
+            if version == self.version:
+                return
+            session = new_session()
+            try:
+                rows = session.query(
+                    TokenRevocation.user_id, TokenRevocation.token_hash, TokenRevocation.created_at
+                ).filter(TokenRevocation.expires_at > datetime.utcnow()).all()
+            finally:
+                session.close()
+
+            users = {}
+            for row in rows:
+                if row.token_hash is None:
+                    users[row.user_id] = max(users.get(row.user_id, 0), _utc_timestamp(row.created_at))
+            # Reemplazo atómico: los requests en curso ven la lista anterior o la nueva completa
+            self.tokens = frozenset(bytes(row.token_hash) for row in rows if row.token_hash is not None)
+            self.users = users
+            self.version = version
+
+    def is_revoked(self, digest, claims):
+        if digest in self.tokens:
+            return True
+        revoked_before = self.users.get(claims.get('user_id'))
+        # 'iat' tiene resolución de segundos: también se rechaza lo emitido en el mismo
+        # segundo de la revocación (un login justo después solo tiene que reintentar)
+        return revoked_before is not None and claims.get('iat', 0) <= int(revoked_before)
+
+_cache = VerifiedTokenCache(Config.TOKEN_CACHE_MAX_ENTRIES, Config.TOKEN_CACHE_TTL_SECONDS)
+_revocations = RevocationList()
+_revoked_rejections = 0
+
+def verify_access_token(token: str):
+    """
+    Claims del access token. La firma y el 'exp' se verifican solo en el primer uso del
+    token; la revocación se revisa en cada request (también en los aciertos de la caché).
+    Lanza jwt.InvalidTokenError si el token no es válido o fue revocado.
+    """
+    global _revoked_rejections
+    digest = token_digest(token)
+    claims = _cache.get(digest)
+    if claims is None:
+        started = time.perf_counter()
+        claims = jwt.decode(token, Config.SECRET_KEY, algorithms=['HS256'])
+        # Un refresh token (365 días) no sirve como credencial de la API
+        if claims.get('type') == 'refresh':
+            raise jwt.InvalidTokenError("Se esperaba un access token")
+        _cache.put(digest, claims, time.perf_counter() - started)
+
+    _revocations.refresh()
+    if _revocations.is_revoked(digest, claims):
+        _revoked_rejections += 1
+        raise jwt.InvalidTokenError("Token revocado")
+    return claims
+
+def revoke_access_token(session, user_id: int, token: str):
+    """Revoca un access token (logout). Usa la sesión del llamador, NO hace commit."""
+    try:
+        claims = jwt.decode(token, Config.SECRET_KEY, algorithms=['HS256'])
+    except jwt.InvalidTokenError:
+        return  # Ya no es válido: no hace falta revocarlo
+    session.add(TokenRevocation(
+        user_id=user_id,
+        token_hash=token_digest(token),
+        expires_at=datetime.fromtimestamp(claims['exp'], timezone.utc).replace(tzinfo=None)
+    ))
+    bump_content_version(session, AUTH_SCOPE)
+
+def revoke_user_tokens(session, user_id: int):
+    """Revoca todos los access tokens emitidos hasta ahora al usuario (cambio de contraseña)."""
+    now = datetime.utcnow()
+    session.add(TokenRevocation(
+        user_id=user_id,
+        token_hash=None,
+        created_at=now,
+        expires_at=now + Config.ACCESS_TOKEN_EXPIRES
+    ))
+    bump_content_version(session, AUTH_SCOPE)
+
+def purge_token_revocations():
+    """Borra revocaciones vencidas (los tokens que cubrían ya expiraron)."""
+    session = new_session()
+    try:
+        deleted = session.query(TokenRevocation).filter(
+            TokenRevocation.expires_at < datetime.utcnow()
+        ).delete(synchronize_session=False)
+        session.commit()
+        return deleted
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+def get_token_cache_stats():
+    stats = _cache.stats()
+    stats["revoked_rejections"] = _revoked_rejections
+    stats["revocations"] = len(_revocations.tokens) + len(_revocations.users)
+    return stats
@@ -1,4 +1,5 @@
 from services.email_service import EmailService
+from services.email_sender import EmailSender
 
 email_service = EmailService()
 code = email_service.generate_verification_code()
@@ -10,6 +11,10 @@ try:
         code,
         "Usuario de Prueba"
     )
+    # El servicio solo encola: enviar ahora lo pendiente (lo mismo que hace scripts/email_worker.py)
+    sender = EmailSender()
+    sender.send_batch()
+    sender.close()
     print("✅ Email enviado correctamente!")
 except Exception as e:
     print(f"❌ Error: {e}")
\ No newline at end of file
@@ -0,0 +1,109 @@
+# backend/tests/conftest.py
+"""
+Fixtures de las pruebas.
+Se usa TEST_DATABASE_URL (Postgres) si está definida; si no, un SQLite temporal con
+equivalentes de los tipos y funciones de Postgres que usan los modelos.
+Instalar con:  pip install -r requirements-dev.txt  (en la raíz del repo)
+Ejecutar desde backend/:  python -m pytest -q
+"""
+import itertools
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+import pytest
+import sentry_sdk
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+_sqlite_dir = None
+if os.getenv('TEST_DATABASE_URL'):
+    os.environ['DATABASE_URL'] = os.environ['TEST_DATABASE_URL']
+else:
+    _sqlite_dir = tempfile.mkdtemp(prefix='cyberlearn-tests-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_sqlite_dir, 'test.db')}"
+os.environ.setdefault('SECRET_KEY', 'test-secret-key')
+
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from config import Config
+from database.db import Base, engine, new_session, SessionLocal
+from models.content_version import ContentVersion
+from services import streak_service
+
+if _sqlite_dir:
+    @compiles(JSONB, 'sqlite')
+    def _jsonb_sqlite(type_, compiler, **kw):
+        return 'JSON'
+
+    @compiles(TSVECTOR, 'sqlite')
+    def _tsvector_sqlite(type_, compiler, **kw):
+        return 'TEXT'
+
+    @event.listens_for(engine, 'connect')
+    def _sqlite_functions(connection, record):
+        def present(values):
+            return [v for v in values if v is not None]
+        connection.create_function('greatest', -1, lambda *a: max(present(a), default=None), deterministic=True)
+        connection.create_function('least', -1, lambda *a: min(present(a), default=None), deterministic=True)
+        connection.create_function('to_tsvector', 2, lambda config, text: text, deterministic=True)
+        connection.create_function('setweight', 2, lambda vector, weight: vector, deterministic=True)
+
+# Cada prueba arranca las versiones de contenido en un valor nuevo: las cachés por proceso
+# (catálogo del glosario, grafo de cursos...) nunca reutilizan datos de otra prueba
+_version_base = itertools.count(1000, 1000)
+_SCOPES = ('glossary', 'courses', 'test_preference', 'badges', 'leaderboard', 'auth')
+
+@pytest.fixture
+def db(monkeypatch):
+    """Base de datos vacía con el esquema completo."""
+    monkeypatch.setattr(Config, 'CONTENT_VERSION_CHECK_SECONDS', 0)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    base = next(_version_base)
+    session = new_session()
+    session.add_all([ContentVersion(scope=scope, version=base) for scope in _SCOPES])
+    session.commit()
+    session.close()
+
+    # Cachés del día de las rachas (los ids de usuario se repiten entre pruebas)
+    streak_service._today = None
+    yield
+    SessionLocal.remove()
+
+@pytest.fixture
+def client(db):
+    """Cliente de la API Flask (la app se importa al primer uso)."""
+    from app import app
+    # La app inicializa Sentry al importarse: las pruebas no reportan nada
+    sentry_sdk.init(dsn=None)
+    return app.test_client()
+
+@pytest.fixture
+def auth_headers():
+    """Encabezado Authorization con un access token válido para el usuario."""
+    from services.auth_service import AuthService
+
+    def make(user_id):
+        token, _ = AuthService()._create_token(user_id, Config.ACCESS_TOKEN_EXPIRES)
+        return {'Authorization': f'Bearer {token}'}
+    return make
+
+@pytest.fixture
+def count_queries():
+    """Context manager que cuenta las sentencias SQL ejecutadas dentro del bloque."""
+    @contextmanager
+    def counter():
+        executed = []
+
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            executed.append(statement)
+
+        event.listen(engine, 'before_cursor_execute', before_execute)
+        try:
+            yield executed
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_execute)
+    return counter
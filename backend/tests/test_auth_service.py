@@ -0,0 +1,30 @@
+# backend/tests/test_auth_service.py
+from datetime import datetime, timedelta
+from database.db import new_session
+from models.user import User
+from models.refresh_token import RefreshToken
+from services.auth_service import purge_refresh_tokens
+
+USER_ID = 1
+
+def test_purge_removes_expired_and_revoked_tokens_in_batches(db):
+    now = datetime.utcnow()
+    session = new_session()
+    session.add(User(id=USER_ID, email='sesion@uni.pe', password_hash='x', name='Sesión'))
+    session.flush()
+    for i in range(5):
+        session.add(RefreshToken(user_id=USER_ID, token_hash=RefreshToken.hash_token(f"vencido-{i}"),
+                                 expires_at=now - timedelta(days=1)))
+        session.add(RefreshToken(user_id=USER_ID, token_hash=RefreshToken.hash_token(f"revocado-{i}"),
+                                 expires_at=now + timedelta(days=30), revoked=True))
+    session.add(RefreshToken(user_id=USER_ID, token_hash=RefreshToken.hash_token("vigente"),
+                             expires_at=now + timedelta(days=30)))
+    session.commit()
+    session.close()
+
+    assert purge_refresh_tokens(batch_size=2) == 10
+
+    session = new_session()
+    remaining = session.query(RefreshToken.token_hash).all()
+    session.close()
+    assert [bytes(h) for (h,) in remaining] == [RefreshToken.hash_token("vigente")]
@@ -0,0 +1,75 @@
+# backend/tests/test_badge_service.py
+from sqlalchemy import text
+from database.db import new_session
+from models.user import User
+from models.badge import Badge
+from models.badge_job import BadgeJob
+from models.user_badge import UserBadge
+from services.badge_service import BadgeService
+from services.content_version_service import bump_content_version, BADGES_SCOPE
+from config import Config
+
+GOOD_USER, BAD_USER = 1, 2
+
+def _seed_jobs():
+    session = new_session()
+    session.add_all([
+        User(id=GOOD_USER, email='bien@uni.pe', password_hash='x', name='Bien', total_xp=150),
+        User(id=BAD_USER, email='mal@uni.pe', password_hash='x', name='Mal', total_xp=150),
+        Badge(id=1, name='Primeros 100 XP', trigger_type='xp_milestone', trigger_value='100'),
+    ])
+    session.flush()
+    session.add_all([
+        BadgeJob(user_id=BAD_USER, events='xp'),
+        BadgeJob(user_id=GOOD_USER, events='xp'),
+        BadgeJob(user_id=GOOD_USER, events='lesson'),
+    ])
+    bump_content_version(session, BADGES_SCOPE)
+    session.commit()
+    session.close()
+
+def _fail_for_bad_user(monkeypatch):
+    """El usuario BAD_USER falla con un error de la BD después de que se le otorga la insignia."""
+    original = BadgeService.check_and_award_badges
+
+    def check_and_award_badges(self, user_id, session, events, pending=False):
+        earned = original(self, user_id, session, events, pending)
+        if user_id == BAD_USER:
+            session.execute(text("SELECT * FROM tabla_inexistente"))
+        return earned
+    monkeypatch.setattr(BadgeService, 'check_and_award_badges', check_and_award_badges)
+
+def _jobs():
+    session = new_session()
+    try:
+        return [(job.user_id, job.status, job.attempts) for job in session.query(BadgeJob).order_by(BadgeJob.id)]
+    finally:
+        session.close()
+
+def test_failing_user_does_not_block_the_rest_of_the_batch(db, monkeypatch):
+    _seed_jobs()
+    _fail_for_bad_user(monkeypatch)
+
+    assert BadgeService().process_jobs() == 3
+
+    # Los jobs del usuario sano se procesaron y borraron; el otro suma un intento
+    # y su insignia se deshizo con el savepoint
+    assert _jobs() == [(BAD_USER, 'pending', 1)]
+    session = new_session()
+    awarded = session.query(UserBadge.user_id, UserBadge.pending).all()
+    session.close()
+    assert awarded == [(GOOD_USER, True)]
+
+def test_job_is_marked_failed_after_max_attempts(db, monkeypatch):
+    _seed_jobs()
+    _fail_for_bad_user(monkeypatch)
+    monkeypatch.setattr(Config, 'BADGE_JOB_MAX_ATTEMPTS', 3)
+    service = BadgeService()
+
+    service.process_jobs()
+    assert service.process_jobs() == 1
+    assert service.process_jobs() == 1
+    assert _jobs() == [(BAD_USER, 'failed', 3)]
+
+    # Un job descartado ya no se vuelve a tomar
+    assert service.process_jobs() == 0
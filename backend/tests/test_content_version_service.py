@@ -0,0 +1,24 @@
+# backend/tests/test_content_version_service.py
+from database.db import new_session
+from models.content_version import ContentVersion
+from services.content_version_service import bump_content_version, get_content_version
+
+def test_first_bump_creates_scope_and_later_bumps_increment(db):
+    session = new_session()
+    bump_content_version(session, 'nuevo_scope')
+    session.commit()
+    assert get_content_version('nuevo_scope', max_age=0) == 1
+
+    bump_content_version(session, 'nuevo_scope')
+    bump_content_version(session, 'nuevo_scope')
+    session.commit()
+    session.close()
+    assert get_content_version('nuevo_scope', max_age=0) == 3
+
+def test_bump_keeps_existing_version(db):
+    session = new_session()
+    before = session.get(ContentVersion, 'glossary').version
+    bump_content_version(session, 'glossary')
+    session.commit()
+    session.close()
+    assert get_content_version('glossary', max_age=0) == before + 1
@@ -0,0 +1,71 @@
+# backend/tests/test_dashboard_service.py
+from database.db import new_session
+from models.user import User
+from models.course import Course
+from models.lesson import Lesson
+from models.user_progress import UserCourseProgress
+from services.dashboard_service import get_dashboard
+
+USER_ID = 1
+
+def _add_courses(start, count, lessons_per_course=3):
+    """Cursos con lecciones; el usuario completó el primero de cada tanda y lleva una lección de cada uno de los demás."""
+    session = new_session()
+    for course_id in range(start, start + count):
+        session.add(Course(id=course_id, title=f"Curso {course_id}", level='Básico'))
+        for i in range(1, lessons_per_course + 1):
+            session.add(Lesson(
+                id=f"c{course_id}-l{i}", course_id=course_id, title=f"Lección {i}",
+                order_index=i, content={"text": "..."}
+            ))
+        session.add(UserCourseProgress(
+            user_id=USER_ID, course_id=course_id,
+            completed_lessons=3 if course_id == start else 1,
+            total_lessons=lessons_per_course,
+            percentage=100 if course_id == start else 33
+        ))
+    session.commit()
+    session.close()
+
+def _dashboard_queries(count_queries):
+    # Primera visita del día: registra la actividad y calienta la racha
+    get_dashboard(USER_ID)
+    with count_queries() as executed:
+        dashboard = get_dashboard(USER_ID)
+    return dashboard, len(executed)
+
+def test_dashboard_query_count_is_flat_as_courses_grow(db, count_queries):
+    session = new_session()
+    session.add(User(id=USER_ID, email='panel@uni.pe', password_hash='x', name='Panel', total_xp=300))
+    session.commit()
+    session.close()
+
+    _add_courses(1, 2)
+    dashboard, small = _dashboard_queries(count_queries)
+    assert dashboard["total_courses"] == 2
+
+    _add_courses(3, 10)
+    dashboard, large = _dashboard_queries(count_queries)
+    assert dashboard["total_courses"] == 12
+
+    assert large == small
+    # Usuario + badges + test, y cursos con su progreso (la racha ya está en caché)
+    assert small <= 2
+
+def test_dashboard_summarizes_progress(db):
+    session = new_session()
+    session.add(User(id=USER_ID, email='panel@uni.pe', password_hash='x', name='Panel', total_xp=300))
+    session.commit()
+    session.close()
+    _add_courses(1, 3)
+
+    dashboard = get_dashboard(USER_ID)
+
+    assert dashboard["completed_courses"] == 1
+    assert dashboard["next_course"] == {"title": "Curso 2", "level": "Básico"}
+    assert dashboard["courses_progress"][1] == {
+        "course_id": 2, "title": "Curso 2", "completed_lessons": 1,
+        "total_lessons": 3, "percentage": 33
+    }
+    assert dashboard["current_streak"] == 1
+    assert dashboard["institution"] == "UNI"
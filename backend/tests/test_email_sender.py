@@ -0,0 +1,122 @@
+# backend/tests/test_email_sender.py
+from datetime import datetime, timedelta
+import smtplib
+import pytest
+from database.db import new_session
+from models.email_outbox import EmailOutbox
+from services.email_sender import EmailSender
+from services.email_service import EmailService
+from config import Config
+
+class FakeSMTP:
+    """Servidor SMTP de prueba: guarda los mensajes o falla si `failing` está activo."""
+    sent = []
+    connections = 0
+    failing = False
+
+    def __init__(self, host, port, timeout=None):
+        FakeSMTP.connections += 1
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def send_message(self, message):
+        if FakeSMTP.failing:
+            raise smtplib.SMTPDataError(451, b"Servidor ocupado")
+        FakeSMTP.sent.append(message)
+
+    def quit(self):
+        pass
+
+@pytest.fixture
+def smtp(monkeypatch):
+    monkeypatch.setattr(smtplib, 'SMTP', FakeSMTP)
+    FakeSMTP.sent = []
+    FakeSMTP.connections = 0
+    FakeSMTP.failing = False
+    return FakeSMTP
+
+def _outbox():
+    session = new_session()
+    try:
+        return session.query(EmailOutbox).order_by(EmailOutbox.id).all()
+    finally:
+        session.close()
+
+def _make_due():
+    session = new_session()
+    session.query(EmailOutbox).update({"next_attempt_at": datetime.utcnow() - timedelta(seconds=1)})
+    session.commit()
+    session.close()
+
+def test_claimed_emails_are_sent_once_over_one_connection(db, smtp):
+    EmailService().send_verification_email('ana@uni.pe', '123456', 'Ana')
+    EmailService().send_welcome_email('luis@uni.pe', 'Luis')
+    sender = EmailSender()
+
+    assert sender.send_batch() == 2
+    assert sender.send_batch() == 0
+
+    assert [m["To"] for m in smtp.sent] == ['ana@uni.pe', 'luis@uni.pe']
+    assert smtp.connections == 1
+    assert [(e.status, e.attempts) for e in _outbox()] == [('sent', 1), ('sent', 1)]
+
+def test_failed_send_is_rescheduled_with_backoff(db, smtp):
+    EmailService().send_verification_email('ana@uni.pe', '123456', 'Ana')
+    sender = EmailSender()
+
+    smtp.failing = True
+    before = datetime.utcnow()
+    assert sender.send_batch() == 1
+
+    email = _outbox()[0]
+    assert (email.status, email.attempts) == ('pending', 1)
+    assert 'Servidor ocupado' in email.last_error
+    assert email.next_attempt_at >= before + timedelta(seconds=30)
+    # Aún no vence el backoff
+    assert sender.send_batch() == 0
+
+    # Segundo fallo: el backoff se duplica
+    _make_due()
+    before = datetime.utcnow()
+    sender.send_batch()
+    assert _outbox()[0].next_attempt_at >= before + timedelta(seconds=60)
+
+    smtp.failing = False
+    _make_due()
+    assert sender.send_batch() == 1
+    assert len(smtp.sent) == 1
+    email = _outbox()[0]
+    assert (email.status, email.attempts, email.last_error) == ('sent', 3, None)
+
+def test_email_is_marked_failed_after_max_attempts(db, smtp, monkeypatch):
+    monkeypatch.setattr(Config, 'EMAIL_MAX_ATTEMPTS', 2)
+    EmailService().send_verification_email('ana@uni.pe', '123456', 'Ana')
+    sender = EmailSender()
+    smtp.failing = True
+
+    sender.send_batch()
+    _make_due()
+    sender.send_batch()
+    assert [(e.status, e.attempts) for e in _outbox()] == [('failed', 2)]
+
+    # Descartado: ya no se vuelve a tomar aunque el servidor se recupere
+    smtp.failing = False
+    _make_due()
+    assert sender.send_batch() == 0
+    assert smtp.sent == []
+
+def test_lease_of_a_dead_worker_expires(db, smtp):
+    EmailService().send_verification_email('ana@uni.pe', '123456', 'Ana')
+    # Otro worker reservó la fila y murió antes de registrar el resultado
+    assert EmailSender()._claim(10)
+
+    sender = EmailSender()
+    assert sender.send_batch() == 0
+    _make_due()
+    assert sender.send_batch() == 1
+    assert [(e.status, e.attempts) for e in _outbox()] == [('sent', 2)]
+    assert len(smtp.sent) == 1
@@ -0,0 +1,84 @@
+# backend/tests/test_glossary_search.py
+from services.glossary_search import GlossarySearchIndex, TrigramIndex, SuggestIndex
+
+def _term(term_es, term_en, acronym=None, definition_es='', definition_en='', example_es='', example_en=''):
+    return {
+        'term_es': term_es, 'term_en': term_en, 'acronym': acronym,
+        'definition_es': definition_es, 'definition_en': definition_en,
+        'example_es': example_es, 'example_en': example_en,
+    }
+
+# Orden del catálogo: la posición es el índice en esta lista
+TERMS = [
+    _term("Autenticación", "Authentication", definition_es="Verificar la identidad de un usuario"),
+    _term("Cortafuegos", "Firewall", definition_es="Filtra el tráfico de red y de la VPN"),
+    _term("Criptografía", "Cryptography", definition_es="Protege datos con cifrado"),
+    _term("Red Privada Virtual", "Virtual Private Network", acronym="VPN",
+          definition_es="Túnel cifrado; suele usarse junto a un firewall"),
+    _term("Segmentación", "Segmentation", example_es="Un firewall entre la red de invitados y la interna"),
+]
+
+def test_term_matches_rank_above_definition_and_example_matches():
+    index = GlossarySearchIndex(TERMS)
+
+    # Término (Firewall) > definición (VPN) > ejemplo (Segmentación)
+    assert index.search("firewall") == [1, 3, 4]
+    assert index.search("firewall", limit=2) == [1, 3]
+    # El acrónimo pesa más que la definición
+    assert index.search("vpn") == [3, 1]
+
+def test_search_ignores_accents_and_case():
+    index = GlossarySearchIndex(TERMS)
+
+    assert index.search("criptografia") == [2]
+    assert index.search("CRIPTOGRAFÍA") == [2]
+    assert index.search("autenticacion") == [0]
+    # Prefijo de cada palabra, sin importar las tildes de la consulta
+    assert index.search("segmentació") == [4]
+
+def test_all_query_words_must_match():
+    index = GlossarySearchIndex(TERMS)
+
+    assert index.search("red privada") == [3]
+    assert index.search("red ransomware") == []
+
+def test_empty_query_returns_nothing():
+    index = GlossarySearchIndex(TERMS)
+
+    assert index.search("") == []
+    assert index.search("   ") == []
+    assert index.search("¿?") == []
+
+def test_fuzzy_search_tolerates_typos():
+    index = TrigramIndex([
+        _term("Negociación con Ransomware", "Ransomware Negotiation"),
+        _term("Ransomware", "Ransomware"),
+        _term("Phishing Dirigido", "Spear Phishing"),
+        _term("Cortafuegos", "Firewall"),
+    ])
+
+    # A igual similitud, primero el término más corto
+    assert index.search("ransonware", threshold=0.4) == [1, 0]
+    # Palabra por palabra: una sola palabra encuentra términos compuestos
+    assert index.search("fishing", threshold=0.4) == [2]
+    assert index.search("firewal", threshold=0.4) == [3]
+    assert index.search("xyz", threshold=0.4) == []
+
+def test_suggestions_are_ordered_and_limited():
+    index = SuggestIndex([
+        _term("Inyección SQL", "SQL Injection"),
+        _term("Seguridad", "Security"),
+        _term("Secuestro de Sesión", "Session Hijacking"),
+        _term("Sandbox", "Sandbox"),
+        _term("Centro de Operaciones de Seguridad", "Security Operations Center", acronym="SOC"),
+    ])
+
+    # Orden alfabético de la clave coincidente; un término aparece una sola vez
+    assert index.suggest("se") == [(2, 'term_es'), (1, 'term_en'), (4, 'term_en')]
+    assert index.suggest("se", limit=2) == [(2, 'term_es'), (1, 'term_en')]
+    # Primero los valores que empiezan con el prefijo, luego las palabras internas
+    assert index.suggest("seg") == [(1, 'term_es'), (4, 'term_es')]
+    assert index.suggest("soc") == [(4, 'acronym')]
+    # Sin tildes ni mayúsculas
+    assert index.suggest("INYECCION") == [(0, 'term_es')]
+    assert index.suggest("  ") == []
@@ -0,0 +1,159 @@
+# backend/tests/test_glossary_service.py
+from database.db import new_session
+from models.user import User
+from models.glossary import Glossary
+from models.user_glossary_progress import UserGlossaryProgress
+from models.user_glossary_favorite import UserGlossaryFavorite
+from services.content_version_service import bump_content_version, GLOSSARY_SCOPE
+from services.glossary_service import get_glossary_page, search_glossary, get_learned_terms, mark_term_as_learned
+
+USER_ID = 1
+
+def _create_user():
+    session = new_session()
+    session.add(User(id=USER_ID, email='glosario@uni.pe', password_hash='x', name='Glosario'))
+    session.commit()
+    session.close()
+
+def _add_terms(start, count):
+    """Agrega términos; el usuario aprende uno de cada 3 y marca favorito uno de cada 4."""
+    session = new_session()
+    for i in range(start, start + count):
+        term = Glossary(
+            term_es=f"Término {i:03d}", term_en=f"Term {i:03d}",
+            definition_es="Definición de seguridad", definition_en="Security definition"
+        )
+        session.add(term)
+        session.flush()
+        if i % 3 == 0:
+            session.add(UserGlossaryProgress(user_id=USER_ID, glossary_id=term.id, is_learned=True, times_practiced=2))
+        if i % 4 == 0:
+            session.add(UserGlossaryFavorite(user_id=USER_ID, glossary_id=term.id))
+    bump_content_version(session, GLOSSARY_SCOPE)
+    session.commit()
+    session.close()
+
+def _listing_queries(count_queries):
+    # El catálogo se arma una vez por versión: se calienta antes de medir
+    get_glossary_page(user_id=USER_ID)
+    with count_queries() as executed:
+        get_glossary_page(user_id=USER_ID)
+        search_glossary("term", user_id=USER_ID)
+        get_learned_terms(USER_ID)
+    return len(executed)
+
+def test_listing_query_count_does_not_grow_with_terms(db, count_queries):
+    _create_user()
+    _add_terms(0, 5)
+    small = _listing_queries(count_queries)
+
+    _add_terms(5, 80)
+    large = _listing_queries(count_queries)
+
+    assert large == small
+    # Por llamada: versión del catálogo + estado del usuario (y la búsqueda full-text en Postgres)
+    assert small <= 7
+
+def test_listing_merges_user_state(db):
+    _create_user()
+    _add_terms(0, 12)
+
+    terms = {t['term_en']: t for t in get_glossary_page(user_id=USER_ID)['terms']}
+    assert len(terms) == 12
+    assert terms['Term 003']['is_learned'] is True
+    assert terms['Term 003']['times_practiced'] == 2
+    assert terms['Term 004']['is_favorite'] is True
+    assert terms['Term 005']['is_learned'] is False
+    assert terms['Term 005']['is_favorite'] is False
+
+    learned = [t['term_en'] for t in get_learned_terms(USER_ID)]
+    assert learned == ['Term 000', 'Term 003', 'Term 006', 'Term 009']
+
+def test_empty_search_returns_whole_glossary(db):
+    _create_user()
+    session = new_session()
+    session.add_all([
+        Glossary(term_es="Criptografía", term_en="Cryptography",
+                 definition_es="Protege datos con cifrado", definition_en="Protects data"),
+        Glossary(term_es="Autenticación", term_en="Authentication",
+                 definition_es="Verifica identidades", definition_en="Verifies identities"),
+    ])
+    bump_content_version(session, GLOSSARY_SCOPE)
+    session.commit()
+    session.close()
+
+    # Sin consulta: el glosario completo en orden alfabético (sin tocar el motor de búsqueda)
+    assert [t['term_es'] for t in search_glossary("  ", user_id=USER_ID)] == ["Autenticación", "Criptografía"]
+
+def test_suggest_endpoint_clamps_limit(client, auth_headers):
+    _create_user()
+    _add_terms(0, 60)
+    headers = auth_headers(USER_ID)
+
+    response = client.get('/api/glossary/suggest?prefix=t&limit=3', headers=headers)
+    assert [s['term_es'] for s in response.get_json()['suggestions']] == ["Término 000", "Término 001", "Término 002"]
+
+    response = client.get('/api/glossary/suggest?prefix=t&limit=0', headers=headers)
+    assert len(response.get_json()['suggestions']) == 1
+    response = client.get('/api/glossary/suggest?prefix=t&limit=500', headers=headers)
+    assert len(response.get_json()['suggestions']) == 50
+
+def _insert_terms(names):
+    session = new_session()
+    session.add_all([
+        Glossary(term_es=name, term_en=name, definition_es="Definición", definition_en="Definition")
+        for name in names
+    ])
+    bump_content_version(session, GLOSSARY_SCOPE)
+    session.commit()
+    session.close()
+
+def test_cursor_pages_have_no_duplicates_or_gaps_when_terms_are_inserted(db):
+    _insert_terms(["Cifrado", "Firewall", "Hash", "Malware", "Phishing", "Token", "VPN"])
+
+    first = get_glossary_page(limit=3)
+    seen = [t['term_es'] for t in first['terms']]
+    assert seen == ["Cifrado", "Firewall", "Hash"]
+
+    # Entre página y página se agregan términos antes y después del cursor
+    _insert_terms(["Autenticación", "Gusano", "Ransomware", "Zero Day"])
+
+    cursor = first['next_cursor']
+    while cursor:
+        page = get_glossary_page(after=cursor, limit=3)
+        seen += [t['term_es'] for t in page['terms']]
+        cursor = page['next_cursor']
+
+    # Los nuevos antes del cursor no se repiten ni desplazan; los de después aparecen en orden
+    assert seen == ["Cifrado", "Firewall", "Hash", "Malware", "Phishing", "Ransomware", "Token", "VPN", "Zero Day"]
+
+def test_glossary_rejects_non_integer_cursor(client, auth_headers):
+    _create_user()
+    _insert_terms(["Cifrado", "Firewall"])
+    headers = auth_headers(USER_ID)
+
+    assert client.get('/api/glossary?limit=1&after=Cifrado,abc', headers=headers).status_code == 400
+    assert client.get('/api/glossary?limit=1&after=abc', headers=headers).status_code == 400
+
+    response = client.get('/api/glossary?limit=1', headers=headers)
+    cursor = response.get_json()['next_cursor']
+    response = client.get('/api/glossary', query_string={'limit': 1, 'after': cursor}, headers=headers)
+    assert response.status_code == 200
+    assert [t['term_es'] for t in response.get_json()['terms']] == ["Firewall"]
+
+def test_glossary_listing_is_private_and_revalidated(client, auth_headers):
+    _create_user()
+    _insert_terms(["Cifrado"])
+    headers = auth_headers(USER_ID)
+
+    response = client.get('/api/glossary', headers=headers)
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+    etag = response.headers['ETag']
+
+    response = client.get('/api/glossary', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 304
+
+    # El progreso del usuario forma parte del ETag
+    mark_term_as_learned(USER_ID, get_glossary_page()['terms'][0]['id'], True)
+    response = client.get('/api/glossary', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200
@@ -0,0 +1,53 @@
+# backend/tests/test_lesson_cache.py
+import gzip
+import json
+import brotli
+from database.db import new_session
+from models.user import User
+from models.course import Course
+from models.lesson import Lesson
+from services.content_version_service import bump_content_version, COURSES_SCOPE
+
+USER_ID = 1
+SCREENS = [{"title": f"Pantalla {i}", "text": "Contenido de la lección " * 20} for i in range(5)]
+
+def _seed_lesson():
+    session = new_session()
+    session.add(User(id=USER_ID, email='lecciones@uni.pe', password_hash='x', name='Lecciones'))
+    session.add(Course(id=1, title='Fundamentos'))
+    session.add(Lesson(
+        id="l1", course_id=1, title="Lección 1", order_index=1,
+        content={"theme": "neon"}, screens={"screens": SCREENS}
+    ))
+    bump_content_version(session, COURSES_SCOPE)
+    session.commit()
+    session.close()
+
+def test_lesson_served_as_brotli_when_accepted(client, auth_headers):
+    _seed_lesson()
+    headers = auth_headers(USER_ID)
+
+    response = client.get('/api/lessons/l1', headers={**headers, 'Accept-Encoding': 'br, gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'br'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.headers['ETag'].endswith('-br"')
+    assert json.loads(brotli.decompress(response.data))['screens'] == SCREENS
+
+    # El ETag de la variante brotli no valida la variante gzip
+    br_etag = response.headers['ETag']
+    response = client.get('/api/lessons/l1', headers={**headers, 'Accept-Encoding': 'gzip', 'If-None-Match': br_etag})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.data))['total_screens'] == len(SCREENS)
+
+    response = client.get('/api/lessons/l1', headers={**headers, 'Accept-Encoding': 'br', 'If-None-Match': br_etag})
+    assert response.status_code == 304
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+def test_lesson_without_accept_encoding_is_plain_json(client, auth_headers):
+    _seed_lesson()
+
+    response = client.get('/api/lessons/l1', headers={**auth_headers(USER_ID), 'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json()['theme'] == "neon"
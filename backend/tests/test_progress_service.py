@@ -0,0 +1,174 @@
+# backend/tests/test_progress_service.py
+import os
+import threading
+from datetime import datetime
+import pytest
+from database.db import new_session
+from models.user import User
+from models.course import Course
+from models.lesson import Lesson
+from models.user_progress import UserCourseProgress, UserLessonProgress
+from models.user_activity_day import UserActivityDay
+from services.content_graph import get_content_graph
+from services.content_version_service import bump_content_version, COURSES_SCOPE
+from services.progress_service import apply_lesson_completion, sync_lesson_completions
+
+USER_ID = 1
+XP_PER_LESSON = 30
+
+# SQLite serializa las escrituras: la carrera solo se reproduce en Postgres
+requires_postgres = pytest.mark.skipif(
+    not os.getenv('TEST_DATABASE_URL', '').startswith('postgresql'),
+    reason="Las pruebas de concurrencia necesitan TEST_DATABASE_URL apuntando a Postgres"
+)
+
+def _seed_course(lesson_count=4):
+    session = new_session()
+    session.add(User(id=USER_ID, email='progreso@uni.pe', password_hash='x', name='Progreso', total_xp=0))
+    # Ya activo hoy: la marca de la racha no llega a serializar las transacciones del test
+    session.add(UserActivityDay(user_id=USER_ID, day=datetime.utcnow().date()))
+    session.add(Course(id=1, title='Fundamentos'))
+    for i in range(1, lesson_count + 1):
+        session.add(Lesson(
+            id=f"l{i}", course_id=1, title=f"Lección {i}", order_index=i,
+            content={"text": "..."}, xp_reward=XP_PER_LESSON
+        ))
+    bump_content_version(session, COURSES_SCOPE)
+    session.commit()
+    session.close()
+
+def _complete_concurrently(lesson_ids):
+    """Completa cada lección en su propio hilo y transacción, todas a la vez."""
+    graph = get_content_graph()
+    barrier = threading.Barrier(len(lesson_ids))
+    results, errors = [], []
+
+    def worker(lesson_id):
+        session = new_session()
+        try:
+            barrier.wait()
+            results.append(apply_lesson_completion(session, USER_ID, graph.lesson(lesson_id)))
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            errors.append(e)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=worker, args=(lesson_id,)) for lesson_id in lesson_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    return results
+
+def _state():
+    session = new_session()
+    try:
+        total_xp = session.query(User.total_xp).filter_by(id=USER_ID).scalar()
+        lesson_rows = session.query(UserLessonProgress).filter_by(user_id=USER_ID).all()
+        course = session.query(UserCourseProgress).filter_by(user_id=USER_ID, course_id=1).one()
+        return total_xp, lesson_rows, course
+    finally:
+        session.close()
+
+@requires_postgres
+def test_same_lesson_completed_concurrently_awards_xp_once(db):
+    _seed_course()
+
+    results = _complete_concurrently(["l1", "l1"])
+
+    assert sorted(xp for xp, _ in results) == [0, XP_PER_LESSON]
+    total_xp, lesson_rows, course = _state()
+    assert total_xp == XP_PER_LESSON
+    assert len(lesson_rows) == 1
+    assert lesson_rows[0].completed and lesson_rows[0].attempts == 2
+    assert course.completed_lessons == 1
+
+@requires_postgres
+def test_different_lessons_completed_concurrently_lose_no_xp(db):
+    _seed_course(lesson_count=4)
+
+    _complete_concurrently(["l1", "l2", "l3", "l4"])
+
+    total_xp, lesson_rows, course = _state()
+    assert total_xp == 4 * XP_PER_LESSON
+    assert len(lesson_rows) == 4
+    assert course.completed_lessons == 4
+    assert course.percentage == 100
+    assert course.completed_at is not None
+
+def test_repeated_completion_only_counts_attempt(db):
+    _seed_course()
+    lesson = get_content_graph().lesson("l2")
+
+    for _ in range(3):
+        session = new_session()
+        xp_earned, progress = apply_lesson_completion(session, USER_ID, lesson)
+        session.commit()
+        session.close()
+
+    assert xp_earned == 0
+    assert progress["completed_lessons"] == 1 and progress["percentage"] == 25
+    total_xp, lesson_rows, _ = _state()
+    assert total_xp == XP_PER_LESSON
+    assert lesson_rows[0].attempts == 3
+
+def _events(*pairs):
+    return [{"idempotency_key": key, "lesson_id": lesson_id} for key, lesson_id in pairs]
+
+def test_replayed_sync_batch_awards_xp_once(db):
+    _seed_course()
+    batch = _events(("k1", "l1"), ("k2", "l2"))
+
+    first = sync_lesson_completions(USER_ID, batch)
+    assert [r["status"] for r in first["results"]] == ["applied", "applied"]
+    assert first["total_xp"] == 2 * XP_PER_LESSON
+
+    # El cliente no recibió la respuesta y reenvía el mismo lote
+    replay = sync_lesson_completions(USER_ID, batch)
+    assert [(r["status"], r["xp_earned"]) for r in replay["results"]] == [
+        ("duplicate", XP_PER_LESSON), ("duplicate", XP_PER_LESSON)
+    ]
+    assert replay["total_xp"] == 2 * XP_PER_LESSON
+    assert replay["course_progress"][0]["completed_lessons"] == 2
+
+    total_xp, lesson_rows, course = _state()
+    assert total_xp == 2 * XP_PER_LESSON
+    assert all(row.attempts == 1 for row in lesson_rows)
+    assert course.completed_lessons == 2
+
+def test_duplicate_lesson_in_one_batch_counts_once(db):
+    _seed_course()
+
+    result = sync_lesson_completions(USER_ID, _events(("k1", "l3"), ("k2", "l3"), ("k1", "l3")))
+
+    assert [(r["status"], r["xp_earned"]) for r in result["results"]] == [
+        ("applied", XP_PER_LESSON), ("applied", 0), ("duplicate", XP_PER_LESSON)
+    ]
+    total_xp, lesson_rows, course = _state()
+    assert total_xp == XP_PER_LESSON
+    assert len(lesson_rows) == 1 and lesson_rows[0].attempts == 2
+    assert course.completed_lessons == 1 and course.percentage == 25
+
+def test_sync_endpoint_rejects_malformed_events(client, auth_headers):
+    _seed_course()
+    headers = auth_headers(USER_ID)
+
+    for body in (
+        {"events": {"idempotency_key": "k1", "lesson_id": "l1"}},
+        {"events": "l1"},
+        {},
+        {"events": [{"idempotency_key": "k1", "lesson_id": 1}]},
+        {"events": [{"idempotency_key": "k1", "lesson_id": ["l1"]}]},
+    ):
+        response = client.post('/api/progress/sync', json=body, headers=headers)
+        assert response.status_code == 400, body
+
+    # Nada se aplicó
+    session = new_session()
+    assert session.query(UserLessonProgress).filter_by(user_id=USER_ID).count() == 0
+    session.close()
+    response = client.post('/api/progress/sync', json={"events": _events(("k1", "l1"))}, headers=headers)
+    assert response.status_code == 200
@@ -0,0 +1,109 @@
+# backend/tests/test_token_cache.py
+import time
+from datetime import timezone
+import jwt
+import pytest
+from database.db import new_session
+from models.user import User
+from models.token_revocation import TokenRevocation
+from services import token_cache
+from services.auth_service import AuthService
+from services.token_cache import VerifiedTokenCache, verify_access_token, revoke_user_tokens, token_digest
+from config import Config
+
+USER_ID = 1
+
+@pytest.fixture
+def user(db, monkeypatch):
+    # Cada request revisa la versión de las revocaciones (sin esperar el intervalo)
+    monkeypatch.setattr(Config, 'TOKEN_REVOCATION_CHECK_SECONDS', 0)
+    session = new_session()
+    session.add(User(id=USER_ID, email='token@uni.pe', password_hash='x', name='Token'))
+    session.commit()
+    session.close()
+    return USER_ID
+
+def _token(**claims):
+    now = int(time.time())
+    payload = {"user_id": USER_ID, "iat": now, "exp": now + 3600, "jti": f"{now}-{time.perf_counter_ns()}"}
+    payload.update(claims)
+    return jwt.encode(payload, Config.SECRET_KEY, algorithm="HS256")
+
+def test_cached_token_is_rejected_after_logout(client, user):
+    token, _ = AuthService()._create_token(USER_ID, Config.ACCESS_TOKEN_EXPIRES)
+    headers = {'Authorization': f'Bearer {token}'}
+
+    # Dos usos: el segundo sale de la caché de tokens verificados
+    assert client.get('/api/user/profile', headers=headers).status_code == 200
+    hits = token_cache.get_token_cache_stats()["hits"]
+    assert client.get('/api/user/profile', headers=headers).status_code == 200
+    assert token_cache.get_token_cache_stats()["hits"] == hits + 1
+
+    assert client.post('/api/auth/logout', json={}, headers=headers).status_code == 200
+    assert client.get('/api/user/profile', headers=headers).status_code == 401
+
+    # Otro token del mismo usuario sigue siendo válido
+    other, _ = AuthService()._create_token(USER_ID, Config.ACCESS_TOKEN_EXPIRES)
+    assert client.get('/api/user/profile', headers={'Authorization': f'Bearer {other}'}).status_code == 200
+
+def test_refresh_token_is_not_accepted_as_bearer(client, user):
+    refresh, _ = AuthService()._create_token(USER_ID, Config.REFRESH_TOKEN_EXPIRES, is_refresh=True)
+    headers = {'Authorization': f'Bearer {refresh}'}
+
+    assert client.get('/api/user/profile', headers=headers).status_code == 401
+    # Tampoco queda en la caché para un segundo intento
+    assert client.get('/api/user/profile', headers=headers).status_code == 401
+    with pytest.raises(jwt.InvalidTokenError):
+        verify_access_token(refresh)
+
+def test_expired_entry_is_not_served_from_cache(monkeypatch):
+    cache = VerifiedTokenCache(max_entries=10, ttl_seconds=300)
+    now = time.time()
+    digest = token_digest("token")
+    cache.put(digest, {"user_id": USER_ID, "exp": now + 10}, 0.001)
+    assert cache.get(digest) is not None
+
+    # Pasado el 'exp' la entrada se descarta aunque el TTL de la caché no haya vencido
+    monkeypatch.setattr(token_cache.time, 'time', lambda: now + 11)
+    assert cache.get(digest) is None
+    assert cache.stats()["size"] == 0
+
+def test_cache_ttl_caps_long_lived_tokens(monkeypatch):
+    cache = VerifiedTokenCache(max_entries=10, ttl_seconds=60)
+    now = time.time()
+    digest = token_digest("token")
+    cache.put(digest, {"user_id": USER_ID, "exp": now + 7200}, 0.001)
+
+    monkeypatch.setattr(token_cache.time, 'time', lambda: now + 61)
+    assert cache.get(digest) is None
+
+def test_tokens_issued_before_password_change_are_rejected(user):
+    old = _token(iat=int(time.time()) - 600)
+    assert verify_access_token(old)["user_id"] == USER_ID
+
+    session = new_session()
+    revoke_user_tokens(session, USER_ID)
+    session.commit()
+    revoked_at = session.query(TokenRevocation.created_at).scalar()
+    session.close()
+    revoked_second = int(revoked_at.replace(tzinfo=timezone.utc).timestamp())
+
+    # Ya verificado y en caché: igual se rechaza
+    with pytest.raises(jwt.InvalidTokenError):
+        verify_access_token(old)
+    # 'iat' tiene resolución de segundos: lo emitido en el mismo segundo también se rechaza
+    with pytest.raises(jwt.InvalidTokenError):
+        verify_access_token(_token(iat=revoked_second))
+    # Un login en el segundo siguiente obtiene un token válido
+    time.sleep(max(0, revoked_second + 1 - time.time()))
+    assert verify_access_token(_token(iat=revoked_second + 1))["user_id"] == USER_ID
+
+def test_revocation_of_one_user_does_not_affect_others(user):
+    session = new_session()
+    session.add(User(id=2, email='otro@uni.pe', password_hash='x', name='Otro'))
+    revoke_user_tokens(session, USER_ID)
+    session.commit()
+    session.close()
+
+    other = _token(user_id=2, iat=int(time.time()) - 600)
+    assert verify_access_token(other)["user_id"] == 2